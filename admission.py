@@ -0,0 +1,109 @@
+import math
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+from metrics import Counter, Gauge
+
+
+# --- Admission Control Configuration ---
+# Requests first pass a per-client token bucket (too fast: 429), then take one of a
+# fixed number of execution slots. When all slots are busy a request may wait in a
+# bounded queue for a short time; if the queue is full or the wait runs out it is
+# shed at once (503, or a puzzle built from the local fallback words) instead of
+# piling up behind slow upstream I/O.
+ADMISSION_MAX_CONCURRENT = int(os.environ.get("ADMISSION_MAX_CONCURRENT", 32)) # Requests executing at once (0 disables the limiter)
+ADMISSION_MAX_QUEUE = int(os.environ.get("ADMISSION_MAX_QUEUE", 64)) # Requests allowed to wait for a slot
+ADMISSION_QUEUE_TIMEOUT = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT", 0.5)) # Seconds a queued request waits before it is shed
+ADMISSION_OVERLOAD_MODE = os.environ.get("ADMISSION_OVERLOAD_MODE", "fallback") # "fallback" (serve local words) or "reject" (503)
+ADMISSION_RETRY_AFTER = int(os.environ.get("ADMISSION_RETRY_AFTER", 1)) # Retry-After seconds sent with 503
+TRUSTED_PROXY_HOPS = int(os.environ.get("TRUSTED_PROXY_HOPS", 0)) # Reverse proxies in front of the app whose X-Forwarded-For is trusted
+# Clients are told apart by address, so limits default to off unless the proxies are configured:
+# behind an untrusted load balancer every player would share the balancer's bucket
+RATE_LIMIT_PER_SECOND = float(os.environ.get("RATE_LIMIT_PER_SECOND", 10 if TRUSTED_PROXY_HOPS else 0)) # Sustained requests per client (0 disables rate limits)
+RATE_LIMIT_BURST = float(os.environ.get("RATE_LIMIT_BURST", 20)) # Requests a client may make back to back
+BATCH_RATE_LIMIT_PER_SECOND = float(os.environ.get("BATCH_RATE_LIMIT_PER_SECOND", 1000 if RATE_LIMIT_PER_SECOND else 0)) # Sustained batch puzzles per client (0 disables)
+BATCH_RATE_LIMIT_BURST = float(os.environ.get("BATCH_RATE_LIMIT_BURST", 10000)) # Batch puzzles a client may fetch back to back
+RATE_LIMIT_CLIENTS = int(os.environ.get("RATE_LIMIT_CLIENTS", 100000)) # Buckets remembered before the idlest is evicted
+RATE_LIMIT_SHARDS = 16 # Independent locks, as in pattern_state
+
+REJECTIONS = Counter("admission_rejections_total", "Requests shed by admission control", ["reason"])
+FALLBACKS = Counter("admission_fallbacks_total", "Overload requests answered from the local fallback words")
+_limiters = weakref.WeakSet() # Live concurrency limiters, summed by the gauges below
+Gauge("admission_in_flight", "Requests currently holding an execution slot", lambda: sum(limiter.active for limiter in list(_limiters)))
+Gauge("admission_queue_depth", "Requests waiting for an execution slot", lambda: sum(limiter.waiting for limiter in list(_limiters)))
+
+
+class TokenBucketLimiter:
+    """Per-client token buckets in a bounded, sharded LRU."""
+
+    def __init__(self, rate: float = RATE_LIMIT_PER_SECOND, burst: float = RATE_LIMIT_BURST,
+                 capacity: int = RATE_LIMIT_CLIENTS, shards: int = RATE_LIMIT_SHARDS):
+        self.rate = rate # Tokens added per second
+        self.burst = max(1.0, burst) # Bucket size
+        self._shard_capacity = max(1, capacity // shards)
+        self._shards = [(threading.Lock(), OrderedDict()) for _ in range(shards)]
+
+    def check(self, client_id: str, cost: float = 1.0) -> float:
+        """Take `cost` tokens for this client; returns 0 if allowed, else the seconds until it would be."""
+        if self.rate <= 0:
+            return 0.0
+        lock, buckets = self._shards[hash(client_id) % len(self._shards)]
+        now = time.monotonic()
+        with lock:
+            tokens, updated = buckets.pop(client_id, (self.burst, now)) # New clients start with a full bucket
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            needed = min(cost, self.burst) # A request larger than the bucket goes through on a full bucket...
+            allowed = tokens >= needed
+            if allowed:
+                tokens = max(-self.burst, tokens - cost) # ...and leaves it in debt, but never by more than one bucket
+            buckets[client_id] = (tokens, now) # Re-inserted last: most recently used
+            if len(buckets) > self._shard_capacity:
+                buckets.popitem(last=False)
+        return 0.0 if allowed else (needed - tokens) / self.rate
+
+
+class ConcurrencyLimiter:
+    """At most max_concurrent holders, with a bounded queue of timed waiters."""
+
+    def __init__(self, max_concurrent: int = ADMISSION_MAX_CONCURRENT, max_queue: int = ADMISSION_MAX_QUEUE,
+                 queue_timeout: float = ADMISSION_QUEUE_TIMEOUT):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+        _limiters.add(self)
+
+    def acquire(self):
+        """Take a slot; returns None on success, else the rejection reason ("queue_full" or "queue_timeout")."""
+        if self.max_concurrent <= 0:
+            return None
+        with self._cond:
+            if self.active < self.max_concurrent and not self.waiting: # Waiters go first, so nobody starves
+                self.active += 1
+                return None
+            if self.waiting >= self.max_queue:
+                return "queue_full"
+            self.waiting += 1
+            try:
+                if not self._cond.wait_for(lambda: self.active < self.max_concurrent, timeout=self.queue_timeout):
+                    return "queue_timeout"
+                self.active += 1
+                return None
+            finally:
+                self.waiting -= 1
+
+    def release(self) -> None:
+        if self.max_concurrent <= 0:
+            return
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+
+def retry_after_header(seconds: float) -> str:
+    return str(max(1, math.ceil(seconds))) # Retry-After takes whole seconds
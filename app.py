@@ -1,91 +1,496 @@
-from flask import Flask, jsonify
+import startup # Imported first: timestamps the start of app import for startup metrics
+from flask import Flask, Response, jsonify, request, send_from_directory
 from flask_cors import CORS
-import requests
+from werkzeug.middleware.proxy_fix import ProxyFix
+import datetime
+import functools
+import hmac
+import json
 import random
+import threading
+import time
 from dotenv import load_dotenv
 import os
 
-from patterns import ALL_PATTERNS # Assuming patterns.py is in the same directory
+import metrics
+from admission import (ADMISSION_OVERLOAD_MODE, ADMISSION_RETRY_AFTER, BATCH_RATE_LIMIT_BURST, BATCH_RATE_LIMIT_PER_SECOND,
+                       FALLBACKS, RATE_LIMIT_PER_SECOND, REJECTIONS, TRUSTED_PROXY_HOPS, ConcurrencyLimiter,
+                       TokenBucketLimiter, retry_after_header)
+from app_logging import configure_logging, get_logger, sample_request
+from metrics import STAGE_SECONDS, Counter
+
+from pattern_compiler import MAX_WORD_LENGTH, MIN_WORD_LENGTH, compiled
+from pattern_registry import CANONICAL_PATTERNS, REGISTRY
+from pattern_scheduler import PatternScheduler, Session
+from pattern_state import make_store
+from puzzle_bank import open_bank
+from puzzle_buffer import BUFFER_STAGE_SECONDS, PUZZLE_BUFFER_SIZE, PuzzleBuffer
+from puzzle_index import open_index
+from puzzle_pack import PUZZLE_PACK_DIR, latest_pack, pack_encoding
+from request_profiler import PROFILE_ADMIN_TOKEN, RequestProfiler
+from seeded_puzzles import SEEDED_MAX_AGE, SeededPuzzles, daily_key, load_seed_words, puzzle_key, seconds_until_next_utc_day
+from solver import Solver
+from word_pool import FALLBACK_WORDS, WordPool
+from word_store import PLAYABLE_WORDS
 
 load_dotenv()
+configure_logging() # LOG_LEVEL / LOG_SAMPLE_RATE; nothing below WARNING is formatted by default
+logger = get_logger("app")
 
 app = Flask(__name__)
+if TRUSTED_PROXY_HOPS > 0:
+    # remote_addr becomes the client address as seen by the outermost trusted proxy; without this, X-Forwarded-For is ignored
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS)
 
 # Configure CORS for your React app
 CORS(app, resources={r"/*": {"origins": "https://gourav-sharma1857.github.io"}})
 
-# --- New Global Variable for preventing immediate repetition ---
-last_pattern_func = None
+# --- Recent Pattern State (per client, for preventing immediate repetition) ---
+PATTERNS_BY_NAME = {name: info.canonical for name, info in REGISTRY.items()} # Pattern name (aliases included) -> canonical function
+recent_patterns = make_store() # Client id -> encoded scheduler Session; in-process LRU or SQLite shared by workers
+scheduler = PatternScheduler() # Difficulty-weighted shuffle bags with a per-client no-repeat window
+
+# --- Precomputed Puzzle Index (built offline with `python puzzle_index.py`) ---
+puzzle_index = open_index() # Memory-mapped index, or None if it has not been built
+
+# --- Offline Puzzle Bank (built with `python puzzle_bank.py`, loaded from PUZZLE_BANK_PATH) ---
+puzzle_bank = open_bank() # Sharded bank from a large dictionary, or None if not configured
+
+# --- Word Pool (filled at startup, refreshed from Datamuse in the background) ---
+word_pool = WordPool()
+if puzzle_index is None and puzzle_bank is None:
+    word_pool.start()
+
+PATTERN_USAGE = Counter("puzzle_pattern_served_total", "Puzzles served per pattern", ["pattern"])
+
+MAX_BATCH_COUNT = int(os.environ.get("MAX_BATCH_COUNT", 10000)) # Upper bound on puzzles per /get_patterned_words call
+
+# --- Solver (inverse lookup tables over the words currently being served) ---
+if puzzle_index is not None:
+    local_words = puzzle_index.words()
+elif puzzle_bank is not None:
+    local_words = puzzle_bank.words() # The pool is not started with a bank, so the bank's originals are the word set
+else:
+    local_words = None
+solver = None # Rebuilt when the word pool refreshes
+solver_lock = threading.Lock()
+
+# --- Seeded Puzzles (deterministic, CDN-cacheable: /puzzle/<id> and /daily) ---
+seed_words = load_seed_words(local_words)
+seeded_puzzles = SeededPuzzles(seed_words) if seed_words else None # Never from the 5 fallback words: needs a real, stable list
+
+# --- Pre-generated Puzzle Buffer (kept full by a background producer thread) ---
+puzzle_buffer = None # Created below, once produce_puzzle() is defined
+
+@app.before_request
+def start_request_logging():
+    sample_request() # Decide once per request whether its DEBUG/INFO records are kept
+
+
+def client_id() -> str:
+    """Identify the caller's session: an explicit X-Client-Id header, else the client address."""
+    # Clients should send a stable X-Client-Id (e.g. a random id kept in localStorage): without it every
+    # player behind the same proxy or NAT shares one session, and with it its stage and no-repeat window
+    explicit = request.headers.get("X-Client-Id")
+    if explicit:
+        return explicit[:128]
+    return request.remote_addr or ""
+
+
+def rate_limit_key() -> str:
+    """Who is charged for a request: the connection's address (via ProxyFix behind trusted proxies), never a client-set header."""
+    return request.remote_addr or ""
+
+
+def make_puzzle(pattern_func, stage_seconds=STAGE_SECONDS) -> dict:
+    """Get a word and its transformed form for the given pattern, timing each stage into stage_seconds."""
+    pattern_name = pattern_func.__name__
+    start = time.perf_counter()
+    if puzzle_bank is not None and pattern_name in puzzle_bank.pattern_names:
+        # Offline bank: a random row for this pattern (the bank also scores its ambiguity)
+        original_word, transformed_word, _ = puzzle_bank.random_puzzle(pattern_name)
+        stage_seconds.observe(time.perf_counter() - start, "bank_lookup")
+    elif puzzle_index is not None and pattern_name in puzzle_index.pattern_ids:
+        # Precomputed: a random record lookup in the memory-mapped index
+        original_word, transformed_word = puzzle_index.random_puzzle(pattern_name)
+        stage_seconds.observe(time.perf_counter() - start, "index_lookup")
+    else:
+        # Pick a word from the in-process pool (refreshed from Datamuse in the background),
+        # restricted to the words this pattern actually changes where that matters
+        original_word = word_pool.random_word(PLAYABLE_WORDS.get(pattern_func))
+        picked = time.perf_counter()
+        transformed_word = compiled(pattern_func)(original_word) # Table walk for position-wise patterns
+        stage_seconds.observe(picked - start, "word_pick")
+        stage_seconds.observe(time.perf_counter() - picked, "transform")
+    logger.debug("Picked word", extra={"word": original_word, "pattern": pattern_name})
+    return {
+        "original_word": original_word,
+        "transformed_word": transformed_word,
+        "pattern_applied": pattern_name
+    }
+
+
+def serialize_puzzle(puzzle: dict) -> bytes:
+    """Encode a puzzle as the compact JSON body the endpoints send."""
+    return json.dumps(puzzle, separators=(",", ":")).encode()
+
+
+def produce_puzzle(pattern_name: str) -> bytes:
+    """Build one ready-to-send puzzle for the buffer (timed separately from requests)."""
+    return serialize_puzzle(make_puzzle(PATTERNS_BY_NAME[pattern_name], BUFFER_STAGE_SECONDS))
+
+
+# --- Admission Control (per-client rate limits, bounded concurrency, load shedding) ---
+rate_limiter = TokenBucketLimiter() # Single puzzles: one token per request
+batch_rate_limiter = TokenBucketLimiter(BATCH_RATE_LIMIT_PER_SECOND, BATCH_RATE_LIMIT_BURST) # Batches: one token per puzzle
+concurrency_limiter = ConcurrencyLimiter()
+if (RATE_LIMIT_PER_SECOND or BATCH_RATE_LIMIT_PER_SECOND) and not TRUSTED_PROXY_HOPS:
+    logger.warning("Rate limits are on with TRUSTED_PROXY_HOPS=0: clients are keyed by the connection address, "
+                   "so behind a proxy or load balancer every client shares one bucket")
+
+
+def overload_response(status: int, message: str, retry_after: float):
+    response = jsonify({"error": message})
+    response.status_code = status
+    response.headers["Retry-After"] = retry_after_header(retry_after)
+    return response
+
+
+def fallback_puzzle_response():
+    """A puzzle from the local fallback words: no upstream, index or client-state I/O."""
+    pattern_func = random.choice(CANONICAL_PATTERNS)
+    word = random.choice(FALLBACK_WORDS)
+    body = serialize_puzzle({
+        "original_word": word,
+        "transformed_word": compiled(pattern_func)(word),
+        "pattern_applied": pattern_func.__name__
+    })
+    return Response(body, mimetype="application/json", headers={"X-Degraded": "fallback"})
+
+
+# --- Request Profiler (off unless PROFILE_SAMPLE_RATE or the admin endpoint turns it on) ---
+request_profiler = RequestProfiler()
+
+
+def admission_controlled(limiter=rate_limiter, cost=lambda: 1, fallback: bool = True):
+    """Rate-limit per client (charging cost() tokens to limiter), then run the view in a bounded number of slots, shedding what does not fit."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            wait = limiter.check(rate_limit_key(), cost())
+            if wait:
+                REJECTIONS.inc("rate_limited")
+                return overload_response(429, "Too many requests", wait)
+            reason = concurrency_limiter.acquire()
+            if reason is not None:
+                REJECTIONS.inc(reason)
+                if fallback and ADMISSION_OVERLOAD_MODE == "fallback":
+                    FALLBACKS.inc()
+                    return fallback_puzzle_response()
+                return overload_response(503, "Server busy", ADMISSION_RETRY_AFTER)
+            try:
+                response = app.make_response(view(*args, **kwargs))
+            except BaseException:
+                concurrency_limiter.release()
+                raise
+            if response.is_streamed:
+                response.call_on_close(concurrency_limiter.release) # The work happens while the body streams: hold the slot until then
+            else:
+                concurrency_limiter.release()
+            return response
+        return wrapper
+    return decorator
 
-# --- External Word API Configuration (Updated) ---
-WORD_API_URL = "https://api.datamuse.com/words" # New API URL
 
 @app.route("/get_patterned_word", methods=["GET"])
+@admission_controlled()
+@request_profiler.profiled
 def get_patterned_word():
     """
-    Fetches a random word with a length of 5 characters,
-    applies a random pattern, and returns both.
+    Picks a pattern for this client and a 5-letter word, and returns the word
+    with its transformed form (from the puzzle buffer or index when available).
     """
-    global last_pattern_func # Declare intent to modify the global variable
-
     try:
-        # 1. Fetch a word from the external API, specifying length=5
-        # Using Datamuse API: 'ml' for "means like" (general English words), 'sp' for "spelled like" (wildcard pattern)
-        # We'll use 'sp=*?????' to get words with 5 letters.
-        # Alternatively, 'max=1' and 's=5' might work for length, but 'sp' is more direct for exact length.
-        params = {
-            'sp': '?????', # Wildcard for exactly 5 letters
-            'max': 100    # Fetch up to 100 words to pick a random one from
-        }
-        response = requests.get(WORD_API_URL, params=params)
-        response.raise_for_status() # Raise an exception for HTTP errors (4xx or 5xx)
-        word_data = response.json()
-
-        # Filter for words that are strictly 5 letters long and choose one
-        five_letter_words = [d['word'].upper() for d in word_data if len(d['word']) == 5 and d['word'].isalpha()]
-
-        if not five_letter_words:
-            original_word = random.choice(["APPLE", "HOUSE", "TRAIN", "PLANT", "EARTH"])
-            print(f"API returned no suitable 5-letter word, using fallback: {original_word}")
-        else:
-            original_word = random.choice(five_letter_words)
-            print(f"Fetched word from DataMuse: {original_word}")
-
-        # 2. Apply a random pattern
-        # Get available patterns, excluding the last one if it exists
-        available_patterns = ALL_PATTERNS[:] # Create a copy to modify
-        if last_pattern_func and len(available_patterns) > 1:
-            if last_pattern_func in available_patterns:
-                available_patterns.remove(last_pattern_func)
-            # If last_pattern_func wasn't in ALL_PATTERNS (shouldn't happen) or only 1 pattern,
-            # we just proceed with ALL_PATTERNS to avoid error.
-
-        print(f"DEBUG: Total patterns available (excluding last): {len(available_patterns)}")
-
-        # Choose a new pattern
-        pattern_func = random.choice(available_patterns)
-        pattern_name = pattern_func.__name__
-        print(f"DEBUG: Chosen pattern name: {pattern_name}")
+        client = client_id()
+        session = Session.decode(recent_patterns.get(client))
 
-        # Store the chosen pattern as the last one for the next request
-        last_pattern_func = pattern_func
+        # 1. Let the scheduler pick the pattern (weighted by difficulty, never one of the client's last few)
+        start = time.perf_counter()
+        pattern_func, session = scheduler.draw(session)
+        pattern_name = pattern_func.__name__
+        STAGE_SECONDS.observe(time.perf_counter() - start, "select")
 
-        transformed_word = pattern_func(original_word)
+        # 2. Take a pre-generated puzzle for it, or build one inline if the buffer is empty or disabled
+        start = time.perf_counter()
+        body = puzzle_buffer.pop(pattern_name) if puzzle_buffer is not None else None
+        buffered = body is not None
+        if buffered:
+            STAGE_SECONDS.observe(time.perf_counter() - start, "buffer_pop")
+        else:
+            puzzle = make_puzzle(pattern_func)
+            start = time.perf_counter()
+            body = serialize_puzzle(puzzle)
+            STAGE_SECONDS.observe(time.perf_counter() - start, "serialize")
+        logger.debug("Chosen pattern", extra={"pattern": pattern_name, "client": client, "buffered": buffered})
 
-        # 3. Return the data as JSON
-        return jsonify({
-            "original_word": original_word,
-            "transformed_word": transformed_word,
-            "pattern_applied": pattern_name
-        })
+        # Store the updated session (draw count and recent patterns) for the client's next request
+        recent_patterns.set(client, session.encode())
+        PATTERN_USAGE.inc(pattern_name)
+        startup.mark("first_puzzle")
+        return Response(body, mimetype="application/json")
 
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching word from API: {e}")
-        return jsonify({"error": f"Could not fetch word from external API: {e}"}), 500
     except Exception as e:
-        print(f"An unexpected error occurred: {e}")
+        logger.exception("An unexpected error occurred")
         return jsonify({"error": f"Internal server error: {e}"}), 500
 
+
+if PUZZLE_BUFFER_SIZE > 0:
+    puzzle_buffer = PuzzleBuffer(produce_puzzle, [func.__name__ for func in CANONICAL_PATTERNS], PUZZLE_BUFFER_SIZE)
+    puzzle_buffer.start()
+
+
+def requested_count() -> int:
+    """Puzzles asked for by a batch request (already checked by valid_count)."""
+    return int(request.args.get("count", "1"))
+
+
+def valid_count(view):
+    """Reject a bad ?count= with 400 before it is charged to the rate limit or takes a slot."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        count = request.args.get("count", "1")
+        if not count.isdigit() or not 1 <= int(count) <= MAX_BATCH_COUNT:
+            return jsonify({"error": f"count must be an integer between 1 and {MAX_BATCH_COUNT}"}), 400
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@app.route("/get_patterned_words", methods=["GET"])
+@valid_count
+@admission_controlled(batch_rate_limiter, cost=requested_count, fallback=False) # Charged per puzzle; overload gets a 503
+def get_patterned_words():
+    """
+    Streams `count` puzzles as newline-delimited JSON, one object per line.
+    Patterns are scheduled the same way as for the single endpoint.
+    """
+    count = requested_count()
+    client = client_id() # Read while the request context is still active
+
+    def generate():
+        session = Session.decode(recent_patterns.get(client))
+        try:
+            for _ in range(count): # One puzzle is built and sent at a time, so memory does not grow with count
+                pattern_func, session = scheduler.draw(session)
+                recent_patterns.set(client, session.encode())
+                PATTERN_USAGE.inc(pattern_func.__name__)
+                yield json.dumps(make_puzzle(pattern_func)) + "\n"
+        except Exception as e:
+            # Headers are already sent, so report the failure as the final line of the stream
+            logger.exception("An unexpected error occurred while streaming")
+            yield json.dumps({"error": f"Internal server error: {e}"}) + "\n"
+
+    return Response(generate(), mimetype="application/x-ndjson")
+
+
+def get_solver() -> Solver:
+    """Return a Solver for the current word set, rebuilding its tables if the word pool changed."""
+    global solver
+    words = local_words or word_pool.words or FALLBACK_WORDS
+    if solver is None or solver.words is not words:
+        with solver_lock: # Only one thread rebuilds; the others wait and reuse its tables
+            if solver is None or solver.words is not words:
+                solver = Solver(words)
+    return solver
+
+
+def invalid_word(name: str, value: str):
+    """Error message if a word parameter is not MIN_WORD_LENGTH-MAX_WORD_LENGTH letters A-Z, else None."""
+    if not (MIN_WORD_LENGTH <= len(value) <= MAX_WORD_LENGTH and value.isascii() and value.isalpha()):
+        return f"{name} must be {MIN_WORD_LENGTH}-{MAX_WORD_LENGTH} letters A-Z"
+    return None
+
+
+@app.route("/solve", methods=["GET"])
+def solve():
+    """
+    Returns every (original word, pattern) pair that produces the given transformed word.
+    """
+    transformed = request.args.get("transformed", "").strip().upper()
+    if not transformed:
+        return jsonify({"error": "transformed is required"}), 400
+    error = invalid_word("transformed", transformed) # Bounded before any pattern runs on it
+    if error:
+        return jsonify({"error": error}), 400
+    solutions = get_solver().solve(transformed)
+    return jsonify({
+        "transformed_word": transformed,
+        "solutions": [{"original_word": original, "pattern_applied": name} for original, name in solutions]
+    })
+
+
+@app.route("/check", methods=["GET"])
+def check():
+    """
+    Checks a guess against a transformed word, optionally for one specific pattern.
+    """
+    transformed = request.args.get("transformed", "").strip().upper()
+    guess = request.args.get("guess", "").strip().upper()
+    pattern_name = request.args.get("pattern")
+    if not transformed or not guess:
+        return jsonify({"error": "transformed and guess are required"}), 400
+    error = invalid_word("transformed", transformed) or invalid_word("guess", guess) # Every pattern runs on the guess
+    if error:
+        return jsonify({"error": error}), 400
+    if pattern_name is not None and pattern_name not in PATTERNS_BY_NAME:
+        return jsonify({"error": f"Unknown pattern: {pattern_name}"}), 400
+    if pattern_name:
+        pattern_name = PATTERNS_BY_NAME[pattern_name].__name__ # Aliases are checked as their canonical pattern
+    matches = get_solver().matching_patterns(transformed, guess, [pattern_name] if pattern_name else None)
+    return jsonify({
+        "transformed_word": transformed,
+        "guess": guess,
+        "correct": bool(matches),
+        "matching_patterns": matches
+    })
+
+
+def seeded_response(key: str, cache_control: str, **fields):
+    """Serve a seeded puzzle with ETag/Cache-Control, answering conditional requests with 304 before any work."""
+    if seeded_puzzles is None:
+        return jsonify({"error": "seeded puzzles need a word list (PUZZLE_WORDS_PATH, a puzzle index or a puzzle bank)"}), 503
+    etag = seeded_puzzles.etag(key)
+    if request.if_none_match.contains_weak(etag): # If-None-Match compares weakly (RFC 7232), so W/"..." from a CDN still matches
+        response = Response(status=304)
+    else:
+        response = jsonify({**fields, **seeded_puzzles.puzzle(key)})
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = cache_control
+    return response
+
+
+@app.route("/puzzle/<puzzle_id>", methods=["GET"])
+def puzzle_by_id(puzzle_id):
+    """
+    Returns the fixed puzzle for an id or seed; the same id always gives the same puzzle.
+    """
+    if len(puzzle_id) > 64:
+        return jsonify({"error": "puzzle id must be at most 64 characters"}), 400
+    # Fixed for a given word list, but the URL does not name the list: cache briefly and revalidate with the ETag
+    return seeded_response(puzzle_key(puzzle_id), f"public, max-age={SEEDED_MAX_AGE}", puzzle_id=puzzle_id)
+
+
+@app.route("/daily", methods=["GET"])
+def daily_puzzle():
+    """
+    Returns the puzzle of the day (UTC), or of ?date=YYYY-MM-DD.
+    """
+    today = datetime.datetime.now(datetime.timezone.utc).date()
+    requested = request.args.get("date")
+    if requested is None:
+        day = today
+    else:
+        try:
+            day = datetime.date.fromisoformat(requested)
+        except ValueError:
+            return jsonify({"error": "date must be formatted as YYYY-MM-DD"}), 400
+        if day > today:
+            return jsonify({"error": "future daily puzzles are not available yet"}), 404
+    max_age = SEEDED_MAX_AGE # Past days only change with the word list, which the ETag revalidation catches
+    if day == today:
+        max_age = min(max_age, seconds_until_next_utc_day()) # Never outlives the day
+    return seeded_response(daily_key(day), f"public, max-age={max_age}", date=day.isoformat())
+
+
+@app.route("/puzzle_pack", methods=["GET"])
+def puzzle_pack():
+    """
+    Describes the newest offline puzzle pack (built with `python puzzle_pack.py`) and where to download it.
+    """
+    latest = latest_pack()
+    if latest is None:
+        return jsonify({"error": "no puzzle pack has been built"}), 404
+    response = jsonify({**latest, "url": f"/puzzle_pack/{latest['file']}"})
+    response.headers["Cache-Control"] = "public, max-age=300" # Short: a rebuild should reach clients soon
+    return response
+
+
+@app.route("/puzzle_pack/<file_name>", methods=["GET"])
+def puzzle_pack_file(file_name):
+    """
+    Serves a puzzle pack file as precompressed JSON; its name holds its content hash, so it never changes.
+    """
+    encoding = pack_encoding(file_name)
+    if encoding is None:
+        return jsonify({"error": "not a puzzle pack"}), 404
+    if not request.accept_encodings[encoding]:
+        return jsonify({"error": f"this pack is {encoding}-encoded; send Accept-Encoding: {encoding}"}), 406
+    response = send_from_directory(os.path.abspath(PUZZLE_PACK_DIR), file_name, mimetype="application/json",
+                                   etag=file_name.split("-")[1].split(".")[0], max_age=31536000) # 404s if missing
+    response.headers["Content-Encoding"] = encoding # Sent as stored; browsers decompress it transparently
+    response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+
+def admin_only(view):
+    """Require the X-Admin-Token header; without PROFILE_ADMIN_TOKEN configured the endpoint does not exist."""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not PROFILE_ADMIN_TOKEN:
+            return jsonify({"error": "Not found"}), 404
+        if not hmac.compare_digest(request.headers.get("X-Admin-Token", "").encode(), PROFILE_ADMIN_TOKEN.encode()):
+            return jsonify({"error": "Forbidden"}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@app.route("/admin/profile", methods=["GET", "POST"])
+@admin_only
+def admin_profile():
+    """
+    Shows the profiler's state; POST ?rate=0.05 profiles 5% of /get_patterned_word requests (rate=0 turns it off).
+    """
+    if request.method == "POST":
+        try:
+            rate = float(request.args.get("rate", ""))
+        except ValueError:
+            return jsonify({"error": "rate must be a number between 0 and 1"}), 400
+        if not 0.0 <= rate <= 1.0:
+            return jsonify({"error": "rate must be a number between 0 and 1"}), 400
+        request_profiler.set_rate(rate)
+    return jsonify(request_profiler.status())
+
+
+@app.route("/admin/profile/<kind>", methods=["GET"])
+@admin_only
+def admin_profile_download(kind):
+    """
+    Downloads the aggregated profile: "pstats" (load with pstats.Stats) or "collapsed" (for flamegraphs).
+    """
+    if kind == "pstats":
+        body, mimetype, file_name = request_profiler.pstats_dump(), "application/octet-stream", "profile.pstats"
+    elif kind == "collapsed":
+        body, mimetype, file_name = request_profiler.collapsed(), "text/plain", "profile.collapsed"
+    else:
+        return jsonify({"error": "kind must be pstats or collapsed"}), 404
+    if body is None:
+        return jsonify({"error": "no requests have been profiled in the current window"}), 404
+    return Response(body, mimetype=mimetype, headers={
+        "Content-Disposition": f"attachment; filename={file_name}",
+        "Cache-Control": "no-store",
+    })
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """
+    Exposes stage latencies, upstream errors, fallbacks and pattern usage in Prometheus text format.
+    """
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+
+startup.mark("app_loaded")
+
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 10000))
     app.run(debug=True, host="0.0.0.0", port=port)
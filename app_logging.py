@@ -0,0 +1,103 @@
+import atexit
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+
+
+# --- Logging Configuration ---
+# Records are formatted as one JSON object per line and written by a background
+# listener thread, so request threads only pay for putting a record on a queue.
+# DEBUG/INFO records from requests are sampled per request; WARNING and above are
+# always kept. At the default WARNING level a debug call is a single level check.
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "WARNING").upper() # DEBUG, INFO, WARNING, ERROR
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", 1.0)) # Fraction of requests whose DEBUG/INFO records are kept
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", 10000)) # Records buffered before new ones are dropped
+LOGGER_NAME = "cipher" # Parent of every application logger
+
+_request_sampled = contextvars.ContextVar("request_sampled", default=True) # Outside requests (startup, background threads) always log
+_STANDARD_ATTRS = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime", "taskName"}
+_listener = None
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Return an application logger (a child of the `cipher` logger)."""
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+def sample_request(rate: float = None) -> bool:
+    """Decide whether this request's DEBUG/INFO records are kept; call once at the start of each request."""
+    rate = LOG_SAMPLE_RATE if rate is None else rate
+    sampled = rate >= 1.0 or random.random() < rate
+    _request_sampled.set(sampled)
+    return sampled
+
+
+class SamplingFilter(logging.Filter):
+    """Drops DEBUG/INFO records from requests that were not sampled."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or _request_sampled.get()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message and any `extra=` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update((k, v) for k, v in record.__dict__.items() if k not in _STANDARD_ATTRS)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text # Already rendered by the queue handler
+        return json.dumps(entry, default=str)
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full."""
+
+    def prepare(self, record):
+        # Resolve the message and traceback now (they may reference objects that change), but leave
+        # the JSON formatting to the listener thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass # Never let logging back-pressure slow down a request
+
+
+def configure_logging(level: str = LOG_LEVEL, stream=None) -> None:
+    """Install the queue-based JSON handler on the application logger (idempotent)."""
+    global _listener
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(level)
+    if _listener is not None:
+        return
+    records = queue.Queue(LOG_QUEUE_SIZE)
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter())
+    handler = _DroppingQueueHandler(records)
+    handler.addFilter(SamplingFilter()) # Runs on the calling thread, before the record is queued
+    logger.addHandler(handler)
+    logger.propagate = False
+    _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop) # Flush queued records on shutdown
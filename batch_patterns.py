@@ -0,0 +1,136 @@
+import numpy as np
+
+import patterns
+from patterns import ALL_PATTERNS
+from pattern_compiler import COMPILED_PATTERNS, WORD_LENGTH
+
+
+# --- Batch Transform API ---
+# Words travel as an (N, 5) uint8 array of ASCII codes ("A" = 65 ... "Z" = 90), so
+# encoding and decoding are a single bytes copy. apply_all() returns a
+# (pattern, word, position) array holding every transformed word.
+ASCII_A_UPPER = ord('A')
+IS_VOWEL = np.zeros(26, dtype=bool) # Letter index (A=0) -> is vowel
+IS_VOWEL[[ord(v) - ASCII_A_UPPER for v in patterns.VOWELS]] = True
+
+
+def encode_words(words) -> np.ndarray:
+    """Pack uppercase 5-letter words into an (N, 5) uint8 array of ASCII codes."""
+    words = list(words)
+    data = "".join(words).encode("ascii")
+    if len(data) != WORD_LENGTH * len(words):
+        raise ValueError(f"All words must be {WORD_LENGTH} ASCII letters long.")
+    return np.frombuffer(data, dtype=np.uint8).reshape(len(words), WORD_LENGTH).copy()
+
+
+def decode_words(array: np.ndarray) -> list:
+    """Unpack an (N, 5) uint8 array of ASCII codes back into a list of strings."""
+    data = np.ascontiguousarray(array, dtype=np.uint8).tobytes().decode("ascii")
+    return [data[i:i + WORD_LENGTH] for i in range(0, len(data), WORD_LENGTH)]
+
+
+def _letters(words: np.ndarray) -> np.ndarray:
+    """Validate an (N, 5) ASCII array and return letter indices (A=0 ... Z=25)."""
+    if words.ndim != 2 or words.shape[1] != WORD_LENGTH:
+        raise ValueError(f"Expected an (N, {WORD_LENGTH}) array, got shape {words.shape}.")
+    letters = words.astype(np.int16) - ASCII_A_UPPER
+    if letters.size and (letters.min() < 0 or letters.max() > 25):
+        raise ValueError("Batch transforms only accept uppercase A-Z words.")
+    return letters
+
+
+def _to_ascii(letters: np.ndarray) -> np.ndarray:
+    return (letters + ASCII_A_UPPER).astype(np.uint8)
+
+
+# --- Position-wise patterns: one gather through the compiled (5, 26) tables ---
+def _table_transform(compiled_pattern):
+    table = np.array([[ord(c) for c in row] for row in compiled_pattern.tables], dtype=np.uint8) # (5, 26) ASCII outputs
+    positions = np.arange(WORD_LENGTH)
+
+    def transform(letters):
+        return table[positions, letters]
+    return transform
+
+
+# --- Fixed permutations ---
+def _permutation_transform(order):
+    order = np.array(order)
+
+    def transform(letters):
+        return _to_ascii(letters[:, order])
+    return transform
+
+
+# --- Word-dependent patterns ---
+def _vowel_swap_0_2(letters):
+    vowels = IS_VOWEL[letters]
+    out = letters.copy()
+    both = vowels[:, 0] & vowels[:, 2] # Only words with vowels at positions 0 and 2 are swapped
+    out[both, 0], out[both, 2] = letters[both, 2], letters[both, 0]
+    return _to_ascii(out)
+
+
+def _palindrome_or_reverse(letters):
+    return _to_ascii(letters[:, ::-1]) # Reversing a palindrome leaves it unchanged, so this is always a reverse
+
+
+def _character_order_reverse(letters):
+    return _to_ascii(np.sort(letters, axis=1)[:, ::-1])
+
+
+def _vowel_position_swap(letters):
+    vowels = IS_VOWEL[letters]
+    rows = np.nonzero(vowels.sum(axis=1) >= 2)[0] # Words with at least two vowels
+    first = vowels[rows].argmax(axis=1) # Index of the first vowel
+    last = WORD_LENGTH - 1 - vowels[rows, ::-1].argmax(axis=1) # Index of the last vowel
+    out = letters.copy()
+    out[rows, first] = letters[rows, last]
+    out[rows, last] = letters[rows, first]
+    return _to_ascii(out)
+
+
+def _consonant_count_shift(letters):
+    count = (~IS_VOWEL[letters]).sum(axis=1) # Every letter is alphabetic, so non-vowels are consonants
+    return _to_ascii((letters + count[:, None]) % 26)
+
+
+def _last_letter_shift(letters):
+    return _to_ascii((letters + letters[:, -1:]) % 26)
+
+
+BATCH_TRANSFORMS = {func: _table_transform(c) for func, c in COMPILED_PATTERNS.items()} # Reference function -> vectorized form
+BATCH_TRANSFORMS.update({
+    patterns.letter_pair_swap: _permutation_transform([1, 0, 3, 2, 4]),
+    patterns.first_last_swap: _permutation_transform([4, 1, 2, 3, 0]),
+    patterns.middle_three_reverse: _permutation_transform([0, 3, 2, 1, 4]),
+    patterns.vowel_swap_0_2: _vowel_swap_0_2,
+    patterns.palindrome_or_reverse: _palindrome_or_reverse,
+    patterns.character_order_reverse: _character_order_reverse,
+    patterns.vowel_position_swap: _vowel_position_swap,
+    patterns.consonant_count_shift: _consonant_count_shift,
+    patterns.last_letter_shift: _last_letter_shift,
+})
+
+
+def apply_pattern(func, words: np.ndarray) -> np.ndarray:
+    """Apply one pattern to an (N, 5) ASCII array, returning a new (N, 5) ASCII array."""
+    letters = _letters(words)
+    return _apply(func, letters, words)
+
+
+def _apply(func, letters, words):
+    transform = BATCH_TRANSFORMS.get(func)
+    if transform is not None:
+        return transform(letters)
+    # No vectorized form (e.g. a newly added pattern): fall back to the reference, one word at a time
+    return encode_words(func(word) for word in decode_words(words))
+
+
+def apply_all(words: np.ndarray, pattern_funcs=ALL_PATTERNS) -> np.ndarray:
+    """Apply every pattern to every word: (N, 5) ASCII array in, (P, N, 5) ASCII array out."""
+    letters = _letters(words)
+    out = np.empty((len(pattern_funcs), len(words), WORD_LENGTH), dtype=np.uint8)
+    for p, func in enumerate(pattern_funcs):
+        out[p] = _apply(func, letters, words)
+    return out
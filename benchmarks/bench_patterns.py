@@ -0,0 +1,160 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # Run from anywhere: import the app modules
+
+import patterns
+from patterns import ALL_PATTERNS
+from pattern_compiler import compiled
+from fake_datamuse import DEFAULT_WORDS
+
+
+# --- Micro-benchmarks for patterns.py ---
+# Measures per-pattern throughput (words/second), helper costs and whole
+# ALL_PATTERNS sweeps, writes the numbers as JSON and compares them with a stored
+# baseline. Each metric is taken relative to a fixed calibration workload timed
+# right around it, and any metric whose relative speed drops more than
+# --tolerance below the baseline fails the run with a non-zero exit code.
+#
+#   python benchmarks/bench_patterns.py                    # compare with baseline.json
+#   python benchmarks/bench_patterns.py --update-baseline  # record a new baseline
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_TOLERANCE = 0.30 # Allowed slowdown before a metric counts as a regression (timings are noisy)
+SAMPLES = 3 # Calibration-bracketed samples per metric (the median is kept)
+LETTER_WEIGHTS = "EEEEEEEEEEEETTTTTTTTTAAAAAAAAOOOOOOOIIIIIIINNNNNNNSSSSSSHHHHHHRRRRRRDDDDLLLLCCCUUUMMMWWFFGGYYPPBVKJXQZ" # Rough English letter frequencies
+
+
+def realistic_words(count: int, seed: int = 1234) -> list:
+    """Real 5-letter words padded with frequency-weighted random words, so vowel/consonant branches are exercised."""
+    rng = random.Random(seed)
+    words = [w.upper() for w in DEFAULT_WORDS]
+    while len(words) < count:
+        words.append("".join(rng.choice(LETTER_WEIGHTS) for _ in range(5)))
+    return words[:count]
+
+
+def measure(fn, items, repeat: int) -> float:
+    """Best-of-`repeat` throughput of fn over items, in calls per second."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - start)
+    return len(items) / best
+
+
+def _calibration_workload(word: str) -> str:
+    return "".join([chr(ord(c) + 1) for c in word]) # Fixed pure-Python work, unaffected by changes to patterns.py
+
+
+def run(word_count: int, repeat: int) -> dict:
+    words = realistic_words(word_count)
+    chars = [c for word in words for c in word]
+    results = {} # Raw throughput, calls per second
+    relative = {} # Throughput relative to the calibration workload measured right around it
+
+    def record(name, fn, items, scale=1):
+        # Host speed drifts a lot between (and within) runs, so each metric is bracketed by
+        # calibration runs and compared as a ratio; a slower or busier host is not a regression.
+        # The median of a few bracketed samples discards the ones a speed change landed in.
+        samples = []
+        for _ in range(SAMPLES):
+            before = measure(_calibration_workload, words, repeat)
+            value = measure(fn, items, repeat) * scale
+            after = measure(_calibration_workload, words, repeat)
+            samples.append((value / ((before + after) / 2), value))
+        relative[name], results[name] = statistics.median(samples)
+
+    # Helpers (calls per second)
+    record("helper.shift_char", lambda c: patterns.shift_char(c, 3), chars)
+    record("helper.reflect_char", patterns.reflect_char, chars)
+    record("helper.is_vowel", patterns.is_vowel, chars)
+    record("helper.is_consonant", patterns.is_consonant, chars)
+
+    # Each pattern, reference and compiled (words per second)
+    for func in ALL_PATTERNS:
+        record(f"pattern.{func.__name__}", func, words)
+        record(f"compiled.{func.__name__}", compiled(func), words)
+
+    # Whole ALL_PATTERNS sweeps (words per second, every pattern applied to each word)
+    reference = list(ALL_PATTERNS)
+    fast = [compiled(func) for func in ALL_PATTERNS]
+    record("sweep.reference", lambda w: [f(w) for f in reference], words)
+    record("sweep.compiled", lambda w: [f(w) for f in fast], words)
+
+    try:
+        from batch_patterns import apply_all, encode_words
+    except ImportError: # NumPy not installed: skip the batch metric rather than fail
+        pass
+    else:
+        encoded = encode_words(words)
+        record("sweep.batch", lambda _: apply_all(encoded), [None] * 10, scale=len(words))
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "words": word_count,
+            "repeat": repeat,
+        },
+        "results": {name: round(value, 1) for name, value in results.items()},
+        "relative": {name: round(value, 4) for name, value in relative.items()},
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list:
+    """Return (name, baseline, current, ratio) for every metric slower than baseline by more than tolerance."""
+    regressions = []
+    for name, base in baseline["relative"].items():
+        now = current["relative"].get(name)
+        if now is None:
+            continue # Metric removed or unavailable here (e.g. no NumPy)
+        ratio = now / base
+        if ratio < 1 - tolerance:
+            regressions.append((name, baseline["results"][name], current["results"][name], ratio))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark patterns.py and compare against a stored baseline.")
+    parser.add_argument("--words", type=int, default=2000, help="Number of words per measurement")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions per measurement (best is kept)")
+    parser.add_argument("--output", help="Write the results JSON here (default: stdout)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed fractional slowdown")
+    parser.add_argument("--update-baseline", action="store_true", help="Overwrite the baseline with this run")
+    args = parser.parse_args()
+
+    current = run(args.words, args.repeat)
+    text = json.dumps(current, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            f.write(text + "\n")
+        print(f"Baseline written to {args.baseline}", file=sys.stderr)
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline first", file=sys.stderr)
+        sys.exit(0)
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(current, baseline, args.tolerance)
+    for name, base, now, ratio in regressions:
+        print(f"REGRESSION {name}: {now:,.0f}/s vs baseline {base:,.0f}/s ({ratio:.0%} after calibration)", file=sys.stderr)
+    if regressions:
+        print(f"{len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}", file=sys.stderr)
+        sys.exit(1)
+    print(f"No regressions against {args.baseline}", file=sys.stderr)
@@ -0,0 +1,86 @@
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # Run from anywhere: import the app modules
+
+from pattern_scheduler import PatternScheduler, Session
+
+
+# --- Scheduler draw-cost benchmark ---
+# Times PatternScheduler.draw() against synthetic pattern sets of growing size,
+# next to the old selection (copy the list, remove the last pattern, random.choice),
+# and fails if the scheduler's cost per draw at the largest size is more than
+# --max-growth times its cost at the smallest size.
+#
+#   python benchmarks/bench_scheduler.py
+#   python benchmarks/bench_scheduler.py --sizes 8 64 512 4096 --draws 50000
+DEFAULT_SIZES = [8, 32, 128, 512, 2048, 8192]
+DEFAULT_MAX_GROWTH = 2.0 # Allowed largest/smallest per-draw cost ratio (timings are noisy)
+SAMPLES = 3 # Timed runs per size (the median is kept)
+
+
+def synthetic_patterns(count: int):
+    """count distinct no-op pattern functions with difficulties 1..3."""
+    funcs = []
+    for i in range(count):
+        def func(word):
+            return word
+        func.__name__ = f"pattern_{i}"
+        funcs.append(func)
+    return funcs, {func: 1 + i % 3 for i, func in enumerate(funcs)}
+
+
+def time_scheduler(funcs, difficulty, draws: int) -> float:
+    """Seconds per draw for one simulated session of `draws` puzzles."""
+    scheduler = PatternScheduler(funcs, difficulty=difficulty)
+    session = Session()
+    start = time.perf_counter()
+    for _ in range(draws):
+        _, session = scheduler.draw(session)
+    return (time.perf_counter() - start) / draws
+
+
+def time_copy_remove_choice(funcs, draws: int) -> float:
+    """Seconds per draw for the previous selection: list copy + remove + random.choice."""
+    last = None
+    start = time.perf_counter()
+    for _ in range(draws):
+        available = funcs[:]
+        if last is not None:
+            available.remove(last)
+        last = random.choice(available)
+    return (time.perf_counter() - start) / draws
+
+
+def run(sizes, draws: int) -> dict:
+    results = {}
+    for size in sizes:
+        funcs, difficulty = synthetic_patterns(size)
+        results[size] = {
+            "scheduler_ns": statistics.median(time_scheduler(funcs, difficulty, draws) for _ in range(SAMPLES)) * 1e9,
+            "copy_remove_choice_ns": statistics.median(time_copy_remove_choice(funcs, draws) for _ in range(SAMPLES)) * 1e9,
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show that the scheduler's cost per draw does not grow with the pattern count.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Pattern counts to measure")
+    parser.add_argument("--draws", type=int, default=20000, help="Draws per measurement")
+    parser.add_argument("--max-growth", type=float, default=DEFAULT_MAX_GROWTH, help="Allowed largest/smallest cost ratio")
+    args = parser.parse_args()
+
+    results = run(sorted(args.sizes), args.draws)
+    print(json.dumps(results, indent=2))
+    smallest, largest = results[min(results)]["scheduler_ns"], results[max(results)]["scheduler_ns"]
+    growth = largest / smallest
+    print(f"Scheduler cost per draw: {smallest:,.0f} ns at {min(results)} patterns, "
+          f"{largest:,.0f} ns at {max(results)} patterns ({growth:.2f}x)", file=sys.stderr)
+    if growth > args.max_growth:
+        print(f"REGRESSION: per-draw cost grew more than {args.max_growth:.1f}x with the pattern count", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,98 @@
+import argparse
+import os
+import random
+import string
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # Run from anywhere: import the app modules
+
+from patterns import ALL_PATTERNS
+from pattern_compiler import compiled
+from pattern_fusion import compose
+
+
+# --- Equivalence check for the fast pattern paths ---
+# The compiled tables (pattern_compiler), the NumPy batch API (batch_patterns) and
+# fused chains (pattern_fusion) must give exactly what the reference functions in
+# patterns.py give. This applies every path to random words of every length in
+# --min-length..--max-length (plus a few edge-case words) and exits non-zero on
+# the first check with a mismatch, listing some of them.
+#
+#   python benchmarks/check_equivalence.py
+#   python benchmarks/check_equivalence.py --words 5000 --chains 2000 --seed 7
+DEFAULT_MIN_LENGTH, DEFAULT_MAX_LENGTH = 1, 13
+EDGE_WORDS = ["AEIOU", "BCDFG", "AAAAA", "ZZZZZ", "LEVEL", "ABCBA", "Y", "QZ", "EERIE", "ZYXWVUTSRQPONM"]
+MAX_REPORTED = 10 # Mismatches printed per check
+
+
+def outcome(func, word):
+    """Result of func(word), or the exception type if it raised (both paths must raise alike)."""
+    try:
+        return func(word)
+    except Exception as e:
+        return type(e)
+
+
+def sample_words(count: int, min_length: int, max_length: int, rng: random.Random) -> list:
+    words = list(EDGE_WORDS)
+    for length in range(min_length, max_length + 1):
+        words.extend("".join(rng.choice(string.ascii_uppercase) for _ in range(length)) for _ in range(count))
+    return [w for w in words if min_length <= len(w) <= max_length]
+
+
+def check_compiled(words) -> list:
+    """compiled(func) against func, for every pattern and word."""
+    return [(func.__name__, word, outcome(compiled(func), word), outcome(func, word))
+            for func in ALL_PATTERNS for word in words
+            if outcome(compiled(func), word) != outcome(func, word)]
+
+
+def check_batch(words) -> list:
+    """batch_patterns.apply_all against every reference function (the batch API takes 5-letter words only)."""
+    from batch_patterns import apply_all, decode_words, encode_words # NumPy, as in the offline build
+    five = [w for w in words if len(w) == 5]
+    results = apply_all(encode_words(five), ALL_PATTERNS)
+    mismatches = []
+    for func, row in zip(ALL_PATTERNS, results):
+        for word, got in zip(five, decode_words(row)):
+            if got != func(word):
+                mismatches.append((func.__name__, word, got, func(word)))
+    return mismatches
+
+
+def check_fused(words, chains: int, rng: random.Random) -> list:
+    """compose(*chain) against applying the chain's reference functions one by one."""
+    mismatches = []
+    for _ in range(chains):
+        chain = [rng.choice(ALL_PATTERNS) for _ in range(rng.randint(2, 4))]
+        fused = compose(*chain)
+
+        def sequential(word):
+            for func in chain:
+                word = func(word)
+            return word
+        for word in rng.sample(words, min(50, len(words))):
+            if outcome(fused, word) != outcome(sequential, word):
+                mismatches.append(("+".join(f.__name__ for f in chain), word, outcome(fused, word), outcome(sequential, word)))
+    return mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that compiled, batch and fused patterns match patterns.py exactly.")
+    parser.add_argument("--words", type=int, default=1000, help="Random words per length")
+    parser.add_argument("--min-length", type=int, default=DEFAULT_MIN_LENGTH, help="Shortest word length to check")
+    parser.add_argument("--max-length", type=int, default=DEFAULT_MAX_LENGTH, help="Longest word length to check")
+    parser.add_argument("--chains", type=int, default=500, help="Random pattern chains to fuse")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (the same seed checks the same words)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    words = sample_words(args.words, args.min_length, args.max_length, rng)
+    failed = False
+    for name, mismatches in (("compiled", check_compiled(words)), ("batch", check_batch(words)),
+                             ("fused", check_fused(words, args.chains, rng))):
+        print(f"{name:>8}: {len(mismatches)} mismatch(es)", file=sys.stderr)
+        for pattern, word, got, expected in mismatches[:MAX_REPORTED]:
+            print(f"          {pattern}({word}) = {got!r}, expected {expected!r}", file=sys.stderr)
+        failed = failed or bool(mismatches)
+    sys.exit(1 if failed else 0)
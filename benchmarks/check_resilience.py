@@ -0,0 +1,345 @@
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT) # Run from anywhere: import the app modules
+
+from fake_datamuse import FakeDatamuse
+
+
+# --- Resilience checks ---
+# The parts that keep the app answering under abuse and overload, checked against
+# their contracts rather than timed. Unit checks drive the classes directly with
+# rates slow enough that nothing refills mid-check; app checks import app.py with
+# the environment below (pointed at a local fake Datamuse) and use the test client,
+# or a real threaded server where a streamed body must hold its slot. Exits non-zero
+# if any check fails, listing what failed.
+#
+#   admission : token buckets (burst, debt cap), bounded slots and queue, and the
+#               endpoints' 429/503/400 behavior under APP_ENV's limits
+#   upstream  : the circuit breaker's closed/open/half-open cycle, and the upstream
+#               client's deadlines and fail-fast against a failing or hanging fake
+#   state     : the per-client pattern state stores (LRU bounds, SQLite sharing
+#               across instances, the old-column migration, a locked database) and
+#               the endpoint's per-client no-repeat window
+#
+#   python benchmarks/check_resilience.py
+#   python benchmarks/check_resilience.py --only admission state
+APP_ENV = {
+    "TRUSTED_PROXY_HOPS": "0", # Limits keyed by the socket address: headers must not dodge them
+    "RATE_LIMIT_PER_SECOND": "10", "RATE_LIMIT_BURST": "20",
+    "ADMISSION_MAX_CONCURRENT": "4", "ADMISSION_MAX_QUEUE": "0",
+    "PUZZLE_BUFFER_SIZE": "0", "WORD_POOL_SNAPSHOT": "", "PATTERN_STATE_BACKEND": "memory", "LOG_LEVEL": "ERROR",
+}
+CONCURRENT_BATCHES = 30 # Simultaneous streamed batches against 4 slots
+BATCH_COUNT = 3000 # Puzzles per concurrent batch: long enough to overlap
+MAX_RETRY_AFTER = 60 # Seconds: no single request may lock its address out for longer
+
+
+def load_app(fake: FakeDatamuse):
+    """Import app.py pointed at the fake Datamuse (once per process; APP_ENV is applied before any app module loads)."""
+    os.environ["WORD_API_URL"] = fake.url
+    import app
+    logging.getLogger("werkzeug").setLevel(logging.ERROR) # No access log lines for the server check
+    return app
+
+
+def check_token_bucket() -> list:
+    from admission import TokenBucketLimiter
+    failures = []
+    limiter = TokenBucketLimiter(rate=0.001, burst=5) # 1000 s per token: no refill during the check
+    waits = [limiter.check("a") for _ in range(6)]
+    if any(waits[:5]) or not waits[5]:
+        failures.append(f"burst of 5 should allow 5 then limit, got waits {waits}")
+    if limiter.check("b"):
+        failures.append("a second client should have its own bucket")
+    if limiter.check("c", cost=100): # Larger than the bucket: allowed on a full bucket...
+        failures.append("a request larger than the burst should pass on a full bucket")
+    wait = limiter.check("c")
+    if not 0 < wait <= (1 + limiter.burst) / limiter.rate + 1: # ...but the debt is at most one bucket
+        failures.append(f"debt should be capped at one bucket, got a {wait:.0f} s wait")
+    if TokenBucketLimiter(rate=0).check("a", cost=10 ** 6):
+        failures.append("rate 0 should disable the limiter")
+    return failures
+
+
+def check_concurrency_limiter() -> list:
+    from admission import ConcurrencyLimiter
+    failures = []
+    limiter = ConcurrencyLimiter(max_concurrent=2, max_queue=0, queue_timeout=0.05)
+    reasons = [limiter.acquire() for _ in range(3)]
+    if reasons != [None, None, "queue_full"]:
+        failures.append(f"2 slots and no queue should admit 2 then shed, got {reasons}")
+    limiter.release()
+    if limiter.acquire() is not None:
+        failures.append("a released slot should be reusable")
+    queued = ConcurrencyLimiter(max_concurrent=1, max_queue=1, queue_timeout=0.05)
+    queued.acquire()
+    start = time.perf_counter()
+    reason = queued.acquire()
+    if reason != "queue_timeout" or time.perf_counter() - start > 1:
+        failures.append(f"a queued request should time out after 0.05 s, got {reason!r}")
+    if queued.waiting or queued.active != 1:
+        failures.append(f"a timed-out waiter should leave no trace, got active={queued.active} waiting={queued.waiting}")
+    return failures
+
+
+def check_circuit_breaker() -> list:
+    from upstream import CircuitBreaker
+    failures = []
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0.05)
+    for _ in range(2):
+        breaker.record_failure()
+    if breaker.state != CircuitBreaker.CLOSED or not breaker.allow():
+        failures.append(f"2 failures under a threshold of 3 should stay closed, got {breaker.state}")
+    breaker.record_failure()
+    if breaker.state != CircuitBreaker.OPEN or breaker.allow():
+        failures.append(f"the third failure should open the breaker and refuse calls, got {breaker.state}")
+    time.sleep(0.06)
+    probes = [breaker.allow() for _ in range(3)]
+    if probes != [True, False, False]:
+        failures.append(f"after the cool-down exactly one probe should be let through, got {probes}")
+    breaker.record_failure()
+    if breaker.state != CircuitBreaker.OPEN or breaker.allow():
+        failures.append(f"a failed probe should reopen the breaker at once, got {breaker.state}")
+    time.sleep(0.06)
+    breaker.allow()
+    breaker.record_success()
+    if breaker.state != CircuitBreaker.CLOSED or not breaker.allow():
+        failures.append(f"a successful probe should close the breaker, got {breaker.state}")
+    return failures
+
+
+def check_upstream_client() -> list:
+    import requests
+    from upstream import CircuitBreaker, CircuitOpenError, UpstreamClient
+    failures = []
+    fake = FakeDatamuse(error_rate=1.0)
+    fake.start()
+    try:
+        client = UpstreamClient(fake.url, retries=1, backoff=0.01, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=0.1))
+        for _ in range(2):
+            try:
+                client.get_json({"sp": "?????"})
+                failures.append("a 500 from upstream should raise")
+            except requests.exceptions.HTTPError:
+                pass
+        if fake.request_count != 4:
+            failures.append(f"2 calls with 1 retry each should reach upstream 4 times, got {fake.request_count}")
+        try:
+            client.get_json({"sp": "?????"})
+            failures.append("an open breaker should fail fast")
+        except CircuitOpenError:
+            pass
+        if fake.request_count != 4:
+            failures.append(f"an open breaker must not call upstream, got {fake.request_count - 4} extra request(s)")
+        fake.error_rate = 0.0 # Upstream recovers: the probe after the cool-down closes the breaker
+        time.sleep(0.11)
+        if not client.get_json({"sp": "?????"}) or client.breaker.state != CircuitBreaker.CLOSED:
+            failures.append(f"a successful probe should return words and close the breaker, got {client.breaker.state}")
+        client.close()
+    finally:
+        fake.stop()
+
+    hanging = FakeDatamuse(hang_rate=1.0, hang_seconds=5)
+    hanging.start()
+    try:
+        client = UpstreamClient(hanging.url, read_timeout=0.2, retries=0)
+        start = time.perf_counter()
+        try:
+            client.get_json({"sp": "?????"})
+            failures.append("a hanging upstream should raise a timeout")
+        except requests.exceptions.Timeout:
+            pass
+        if time.perf_counter() - start > 1:
+            failures.append(f"the 0.2 s read deadline should bound a hanging call, it took {time.perf_counter() - start:.1f} s")
+        client.close()
+    finally:
+        hanging.stop()
+    return failures
+
+
+def check_lru_store() -> list:
+    from pattern_state import LRUPatternStore
+    failures = []
+    store = LRUPatternStore(capacity=16, shards=1) # One shard, so eviction order is the global LRU order
+    for i in range(16):
+        store.set(f"c{i}", str(i))
+    store.get("c0") # Recently used: survives the next insert
+    store.set("c16", "16")
+    if len(store) != 16 or store.get("c0") != "0" or store.get("c1") is not None:
+        failures.append(f"a full store should evict the least recently used client, got {len(store)} entries, "
+                        f"c0={store.get('c0')!r}, c1={store.get('c1')!r}")
+    sharded = LRUPatternStore(capacity=1000)
+    for i in range(5000):
+        sharded.set(f"c{i}", "x")
+    if len(sharded) > 1000:
+        failures.append(f"a sharded store should stay within its capacity, holds {len(sharded)}")
+    return failures
+
+
+def check_sqlite_store() -> list:
+    from pattern_state import SQLitePatternStore
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "state.sqlite3")
+        first, second = SQLitePatternStore(path), SQLitePatternStore(path) # Two workers on one file
+        first.set("client", "3:a,b:100")
+        if second.get("client") != "3:a,b:100":
+            failures.append(f"a write by one store should be read by another on the same file, got {second.get('client')!r}")
+        second.set("client", "4:b,c:101")
+        if first.get("client") != "4:b,c:101":
+            failures.append(f"an update should replace the client's state, got {first.get('client')!r}")
+
+        old = os.path.join(tmp, "old.sqlite3") # Written before the column was renamed to session
+        with sqlite3.connect(old) as conn:
+            conn.execute("CREATE TABLE recent_patterns (client_id TEXT PRIMARY KEY, pattern_name TEXT NOT NULL, updated_at REAL NOT NULL)")
+            conn.execute("INSERT INTO recent_patterns VALUES ('client', 'letter_pair_swap', 0)")
+        conn.close()
+        if SQLitePatternStore(old).get("client") != "letter_pair_swap":
+            failures.append("an existing pattern_name table should be migrated with its rows")
+
+        locked = SQLitePatternStore(path)
+        blocker = sqlite3.connect(path, isolation_level=None)
+        blocker.execute("BEGIN EXCLUSIVE")
+        try:
+            value = locked.get("client")
+            locked.set("client", "5:c,d:102")
+        except sqlite3.OperationalError as e:
+            failures.append(f"a locked database should be skipped, not raised: {e}")
+        else:
+            if value not in (None, "4:b,c:101"): # WAL readers may still see the committed state
+                failures.append(f"a read while locked should return the committed state or none, got {value!r}")
+        finally:
+            blocker.execute("ROLLBACK")
+            blocker.close()
+        if first.get("client") != "4:b,c:101":
+            failures.append(f"a write skipped while locked should leave the old state, got {first.get('client')!r}")
+    return failures
+
+
+def check_app_no_repeat(app) -> list:
+    """Interleaved clients each keep their own no-repeat window."""
+    failures = []
+    client = app.app.test_client()
+    window = app.scheduler.no_repeat
+    served = {"alice": [], "bob": []}
+    for i in range(40):
+        for name, patterns in served.items():
+            response = client.get("/get_patterned_word", headers={"X-Client-Id": name},
+                                  environ_base={"REMOTE_ADDR": f"10.1.0.{len(patterns) * 2 + (name == 'bob')}"}) # Under the rate limit
+            patterns.append(response.get_json()["pattern_applied"])
+    for name, patterns in served.items():
+        repeats = [i for i in range(len(patterns)) if patterns[i] in patterns[max(0, i - window):i]]
+        if repeats:
+            failures.append(f"{name} got a pattern again within {window} draws at puzzle(s) {repeats}")
+    return failures
+
+
+def check_app_rate_limits(app) -> list:
+    failures = []
+    client = app.app.test_client()
+    start = time.perf_counter()
+    statuses = [client.get("/get_patterned_word", environ_base={"REMOTE_ADDR": "10.0.0.1"},
+                           headers={"X-Client-Id": f"c{i}", "X-Forwarded-For": f"192.0.2.{i}"}).status_code
+                for i in range(60)]
+    allowed = 20 + 10 * (time.perf_counter() - start) + 1 # Burst plus whatever refilled meanwhile
+    if statuses.count(200) > allowed or statuses.count(200) + statuses.count(429) != 60:
+        failures.append(f"rotating X-Client-Id/X-Forwarded-For should not dodge the limit: "
+                        f"{statuses.count(200)} x 200 (at most {allowed:.0f} allowed), {statuses.count(429)} x 429")
+
+    grader = {"REMOTE_ADDR": "10.0.0.2"}
+    batch = client.get(f"/get_patterned_words?count={app.MAX_BATCH_COUNT}", environ_base=grader)
+    batch.close()
+    if batch.status_code != 200:
+        failures.append(f"a maximum-size batch on a fresh address should be served, got {batch.status_code}")
+    single = client.get("/get_patterned_word", environ_base=grader)
+    if single.status_code != 200:
+        failures.append(f"a batch must not drain the single-puzzle bucket, got {single.status_code}")
+    bad = client.get("/get_patterned_words?count=0", environ_base=grader)
+    if bad.status_code != 400:
+        failures.append(f"count=0 should be a 400 even with the batch bucket empty, got {bad.status_code}")
+    again = client.get("/get_patterned_words?count=5", environ_base=grader)
+    again.close()
+    retry_after = int(again.headers.get("Retry-After", 0))
+    if again.status_code != 429 or not 0 < retry_after <= MAX_RETRY_AFTER:
+        failures.append(f"a batch right after a full one should get 429 with a bounded Retry-After, "
+                        f"got {again.status_code} (Retry-After {retry_after})")
+    return failures
+
+
+def check_app_streamed_slots(app) -> list:
+    """Concurrent streamed batches hold their slot until their body is sent, and give it back after."""
+    import requests
+    from werkzeug.serving import make_server
+    failures = []
+    app.batch_rate_limiter.rate = 0 # One address stands in for many clients here: limit slots only
+    server = make_server("127.0.0.1", 0, app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/get_patterned_words?count={BATCH_COUNT}"
+    statuses, barrier = [], threading.Barrier(CONCURRENT_BATCHES)
+
+    def fetch():
+        barrier.wait()
+        response = requests.get(url, timeout=30)
+        statuses.append(response.status_code)
+
+    threads = [threading.Thread(target=fetch) for _ in range(CONCURRENT_BATCHES)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    server.shutdown()
+    limit = app.concurrency_limiter.max_concurrent
+    if not statuses.count(503) or statuses.count(200) < limit or set(statuses) - {200, 503}:
+        failures.append(f"{CONCURRENT_BATCHES} concurrent batches against {limit} slots should be partly shed with 503, "
+                        f"got {statuses.count(200)} x 200, {statuses.count(503)} x 503, others {sorted(set(statuses) - {200, 503})}")
+    if app.concurrency_limiter.active:
+        failures.append(f"every slot should be released once the streams finish, {app.concurrency_limiter.active} still held")
+    return failures
+
+
+def run_app_checks(checks) -> list:
+    fake = FakeDatamuse()
+    fake.start()
+    try:
+        app = load_app(fake)
+        return [(name, check(app)) for name, check in checks]
+    finally:
+        fake.stop()
+
+
+UNIT_CHECKS = {
+    "admission": [("token_bucket", check_token_bucket), ("concurrency_limiter", check_concurrency_limiter)],
+    "upstream": [("circuit_breaker", check_circuit_breaker), ("upstream_client", check_upstream_client)],
+    "state": [("lru_store", check_lru_store), ("sqlite_store", check_sqlite_store)],
+}
+APP_CHECKS = {
+    "admission": [("app_rate_limits", check_app_rate_limits), ("app_streamed_slots", check_app_streamed_slots)],
+    "state": [("app_no_repeat", check_app_no_repeat)],
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check admission control, the upstream client and the pattern state against their contracts.")
+    parser.add_argument("--only", nargs="+", choices=list(UNIT_CHECKS), default=list(UNIT_CHECKS), help="Areas to check")
+    args = parser.parse_args()
+
+    os.environ.update(APP_ENV) # Before the first import of any app module: their settings are read at import
+    from app_logging import configure_logging
+    configure_logging() # LOG_LEVEL=ERROR: the warnings the checks provoke on purpose are not printed
+    results = [(name, check()) for area in args.only for name, check in UNIT_CHECKS[area]]
+    app_checks = [check for area in args.only for check in APP_CHECKS.get(area, ())]
+    if app_checks:
+        results += run_app_checks(app_checks)
+    for name, failures in results:
+        print(f"{name:>20}: {'ok' if not failures else f'{len(failures)} failure(s)'}", file=sys.stderr)
+        for failure in failures:
+            print(f"{'':>22}{failure}", file=sys.stderr)
+    sys.exit(1 if any(failures for _, failures in results) else 0)
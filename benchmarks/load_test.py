@@ -0,0 +1,244 @@
+import argparse
+import concurrent.futures
+import importlib.util
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT) # Run from anywhere: import the app modules
+
+from fake_datamuse import FakeDatamuse
+
+
+# --- End-to-end Load Test ---
+# Starts a local fake Datamuse, then runs app.py under each requested server
+# (the Flask dev server and/or gunicorn with several workers) pointed at it, and
+# drives an endpoint either with a fixed number of concurrent clients (closed loop)
+# or at a fixed request rate (open loop). In open-loop mode latency is measured from
+# the time each request was *scheduled*, so a stalled server is not hidden by the
+# generator slowing down with it. Reports throughput, p50/p95/p99 and error rate.
+# Overload answers from the local fallback words (200 with X-Degraded) are counted
+# apart: they are neither successes nor errors, and their share is reported.
+#
+#   python benchmarks/load_test.py --concurrency 16 --duration 20
+#   python benchmarks/load_test.py --rate 500 --servers gunicorn --workers 4 --upstream-error-rate 0.2
+#   python benchmarks/load_test.py --env PUZZLE_BUFFER_SIZE=0 --output no_buffer.json
+#
+# gunicorn comes from requirements-bench.txt; pass --servers dev to run without it.
+SERVERS = ("dev", "gunicorn")
+STARTUP_TIMEOUT = 30.0 # Seconds to wait for a server to answer before giving up
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def server_command(server: str, port: int, workers: int, threads: int) -> list:
+    if server == "dev":
+        return [sys.executable, "-c",
+                f"import app; app.app.run(host='127.0.0.1', port={port}, debug=False, threaded=True)"]
+    return [sys.executable, "-m", "gunicorn", "--workers", str(workers), "--threads", str(threads),
+            "--bind", f"127.0.0.1:{port}", "--log-level", "warning", "app:app"]
+
+
+def start_server(server: str, port: int, workers: int, threads: int, env: dict) -> subprocess.Popen:
+    """Launch app.py under a server and wait until it answers."""
+    log = tempfile.TemporaryFile(mode="w+") # Not a pipe: a chatty server must never block on a full pipe buffer
+    process = subprocess.Popen(server_command(server, port, workers, threads), cwd=REPO_ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=log)
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            log.seek(0)
+            raise RuntimeError(f"{server} server exited during startup:\n{log.read()[-2000:]}")
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/metrics", timeout=1).ok:
+                return process
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError(f"{server} server did not answer within {STARTUP_TIMEOUT:.0f}s")
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+class Recorder:
+    """Collects per-request latencies and outcomes from many threads."""
+
+    def __init__(self):
+        self.latencies = [] # Seconds, successful requests only
+        self.degraded = 0 # Shed requests answered with a fallback puzzle
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, outcome: str) -> None:
+        with self._lock:
+            if outcome == "ok":
+                self.latencies.append(latency)
+            elif outcome == "degraded":
+                self.degraded += 1
+            else:
+                self.errors += 1
+
+
+def _session_get(sessions, url: str, timeout: float) -> str:
+    """GET url; returns "ok", "degraded" (a 200 flagged X-Degraded) or "error"."""
+    session = getattr(sessions, "session", None)
+    if session is None: # One keep-alive connection pool and client id per load-generator thread
+        session = sessions.session = requests.Session()
+        session.headers["X-Client-Id"] = f"load-{threading.get_ident()}"
+    try:
+        response = session.get(url, timeout=timeout)
+    except requests.RequestException:
+        return "error"
+    if response.status_code != 200:
+        return "error"
+    return "degraded" if "X-Degraded" in response.headers else "ok"
+
+
+def run_closed_loop(url: str, concurrency: int, duration: float, timeout: float) -> tuple:
+    """`concurrency` clients each send their next request as soon as the previous one returns."""
+    recorder, sessions = Recorder(), threading.local()
+    stop_at = time.perf_counter() + duration
+
+    def client():
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            outcome = _session_get(sessions, url, timeout)
+            recorder.record(time.perf_counter() - start, outcome)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder, time.perf_counter() - started
+
+
+def run_open_loop(url: str, rate: float, duration: float, timeout: float, max_in_flight: int) -> tuple:
+    """Send requests on a fixed schedule (`rate` per second), whatever the server's latency."""
+    recorder, sessions = Recorder(), threading.local()
+
+    def send(scheduled: float):
+        outcome = _session_get(sessions, url, timeout)
+        recorder.record(time.perf_counter() - scheduled, outcome) # Includes any time spent waiting for a free sender
+
+    started = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+        for i in range(int(rate * duration)):
+            scheduled = started + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, scheduled)
+    return recorder, time.perf_counter() - started
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> dict:
+    latencies = sorted(recorder.latencies)
+    total = len(latencies) + recorder.degraded + recorder.errors
+    return {
+        "requests": total,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0, # Full puzzles only
+        "degraded_rate": recorder.degraded / total if total else 0.0,
+        "error_rate": recorder.errors / total if total else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else float("nan"),
+    }
+
+
+def run(args) -> dict:
+    if "gunicorn" in args.servers and importlib.util.find_spec("gunicorn") is None:
+        # Fail instead of skipping: the multi-worker run is the one that matters
+        raise SystemExit("gunicorn is not installed (pip install -r requirements-bench.txt), or pass --servers dev")
+    fake = FakeDatamuse(latency=args.upstream_latency, error_rate=args.upstream_error_rate)
+    fake.start()
+    env = dict(os.environ, WORD_API_URL=fake.url, WORD_POOL_SNAPSHOT="", LOG_LEVEL="WARNING",
+               RATE_LIMIT_PER_SECOND="0") # A few generator threads stand in for many users, so no per-client limits
+    env.update(item.split("=", 1) for item in args.env) # --env KEY=VALUE overrides, e.g. to compare configurations
+    results = {}
+    try:
+        for server in args.servers:
+            port = free_port()
+            process = start_server(server, port, args.workers, args.threads, env)
+            url = f"http://127.0.0.1:{port}{args.path}"
+            try:
+                if args.warmup:
+                    run_closed_loop(url, args.concurrency, args.warmup, args.timeout)
+                upstream_before = fake.request_count
+                if args.rate:
+                    recorder, elapsed = run_open_loop(url, args.rate, args.duration, args.timeout, args.max_in_flight)
+                else:
+                    recorder, elapsed = run_closed_loop(url, args.concurrency, args.duration, args.timeout)
+            finally:
+                stop_server(process)
+            results[server] = summarize(recorder, elapsed)
+            results[server]["upstream_requests"] = fake.request_count - upstream_before
+            print(f"{server:>8}: {results[server]['throughput_rps']:8.1f} req/s  "
+                  f"p50 {results[server]['p50_ms']:7.2f} ms  p95 {results[server]['p95_ms']:7.2f} ms  "
+                  f"p99 {results[server]['p99_ms']:7.2f} ms  degraded {results[server]['degraded_rate']:.2%}  "
+                  f"errors {results[server]['error_rate']:.2%}", file=sys.stderr)
+    finally:
+        fake.stop()
+    return {
+        "config": {
+            "path": args.path, "mode": "open" if args.rate else "closed", "rate": args.rate,
+            "concurrency": args.concurrency, "duration": args.duration, "workers": args.workers, "threads": args.threads,
+            "upstream_latency": args.upstream_latency, "upstream_error_rate": args.upstream_error_rate, "env": args.env,
+        },
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test app.py under the dev server and gunicorn against a fake Datamuse.")
+    parser.add_argument("--servers", nargs="+", choices=SERVERS, default=list(SERVERS), help="Servers to test")
+    parser.add_argument("--path", default="/get_patterned_word", help="Endpoint to drive")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients (closed-loop mode)")
+    parser.add_argument("--rate", type=float, default=None, help="Requests per second (open-loop mode instead)")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Open-loop sender threads")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of measured load per server")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds of load before measuring")
+    parser.add_argument("--timeout", type=float, default=5.0, help="Per-request timeout, counted as an error")
+    parser.add_argument("--workers", type=int, default=4, help="gunicorn worker processes")
+    parser.add_argument("--threads", type=int, default=4, help="gunicorn threads per worker")
+    parser.add_argument("--upstream-latency", type=float, default=0.05, help="Fake Datamuse latency in seconds")
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0, help="Fraction of fake Datamuse requests that fail")
+    parser.add_argument("--env", action="append", default=[], help="KEY=VALUE passed to the app (repeatable)")
+    parser.add_argument("--output", help="Write the report JSON here (default: stdout)")
+    args = parser.parse_args()
+
+    report = json.dumps(run(args), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
@@ -0,0 +1,110 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+# --- Local Datamuse Stand-in ---
+# Serves /words like api.datamuse.com does (a JSON list of {"word", "score"} objects
+# filtered by the `sp` wildcard length and capped by `max`), with knobs for latency,
+# error rate and hanging responses so upstream behavior can be exercised offline.
+DEFAULT_WORDS = [
+    "APPLE", "HOUSE", "TRAIN", "PLANT", "EARTH", "BRAIN", "CRANE", "DRIVE", "ELITE", "FABLE",
+    "GUISE", "KINGS", "THINK", "MAGIC", "LEVEL", "OCEAN", "PIANO", "QUIET", "RIVER", "SUGAR",
+    "TIGER", "UNCLE", "VOICE", "WATER", "YOUTH", "ZEBRA", "BREAD", "CHAIR", "DANCE", "FLAME",
+]
+
+
+class FakeDatamuse:
+    """A threaded HTTP server imitating the Datamuse /words endpoint."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, words=DEFAULT_WORDS,
+                 latency: float = 0.0, error_rate: float = 0.0, hang_rate: float = 0.0, hang_seconds: float = 30.0):
+        self.words = [w.lower() for w in words] # Datamuse returns lowercase words
+        self.latency = latency # Seconds added before every response
+        self.error_rate = error_rate # Fraction of requests answered with HTTP 500
+        self.hang_rate = hang_rate # Fraction of requests that stall for hang_seconds (to trip read timeouts)
+        self.hang_seconds = hang_seconds
+        self.request_count = 0
+        self._count_lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/words"
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with fake._count_lock:
+                    fake.request_count += 1
+                parsed = urlparse(self.path)
+                if parsed.path != "/words":
+                    self.send_error(404)
+                    return
+                if fake.latency:
+                    time.sleep(fake.latency)
+                roll = random.random()
+                if roll < fake.hang_rate:
+                    time.sleep(fake.hang_seconds)
+                elif roll < fake.hang_rate + fake.error_rate:
+                    self.send_error(500, "Injected upstream failure")
+                    return
+                query = parse_qs(parsed.query)
+                spelled = query.get("sp", [""])[0]
+                limit = int(query.get("max", ["100"])[0])
+                words = [w for w in fake.words if not spelled or len(w) == len(spelled)][:limit]
+                body = json.dumps([{"word": w, "score": 1000 - i} for i, w in enumerate(words)]).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass # Keep test and load-test output quiet
+
+        return Handler
+
+    def start(self) -> "FakeDatamuse":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-datamuse", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__": # python fake_datamuse.py --port 8765 --latency 0.2 --error-rate 0.1
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the Datamuse /words API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of delay added to every response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="Fraction of requests that stall for --hang-seconds")
+    parser.add_argument("--hang-seconds", type=float, default=30.0)
+    args = parser.parse_args()
+
+    server = FakeDatamuse(args.host, args.port, latency=args.latency, error_rate=args.error_rate,
+                          hang_rate=args.hang_rate, hang_seconds=args.hang_seconds)
+    print(f"Fake Datamuse listening on {server.url} (set WORD_API_URL to point the app at it)")
+    server.start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,186 @@
+import bisect
+import copy
+import threading
+import weakref
+
+
+# --- Low-overhead Metrics in Prometheus Text Format ---
+# Counters and histograms keep one cell per thread that only its owning thread
+# writes, so recording a value never takes a lock. A scrape sums the cells of every
+# live thread plus a shared total: when a thread exits, its cell is folded into that
+# total and dropped, so the number of cells stays bounded by the live threads and
+# counts never go backwards.
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0) # Seconds
+REGISTRY = [] # Every metric created, in creation order, for render()
+
+
+def _format_labels(labelnames, labels, extra=()) -> str:
+    pairs = list(zip(labelnames, labels)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (f'{name}="{_escape(str(value))}"' for name, value in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _PerThreadMetric:
+    """Base for metrics whose hot path writes only to a thread-local cell."""
+
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._cells = {} # id(cell) -> cell, for every live thread that has recorded something
+        self._retired = {} # Totals folded in from the cells of exited threads
+        self._cells_lock = threading.Lock() # Only taken the first time a thread records, and when it exits
+        if registry is not None:
+            registry.append(self)
+
+    def _cell(self) -> dict:
+        cell = getattr(self._local, "cell", None)
+        if cell is None:
+            cell = self._local.cell = {}
+            holder = self._local.holder = _CellHolder() # Freed with the thread's locals when the thread exits
+            with self._cells_lock:
+                self._cells[id(cell)] = cell
+            weakref.finalize(holder, self._retire, cell)
+        return cell
+
+    def _retire(self, cell: dict) -> None:
+        """Fold an exited thread's cell into the shared total and forget the cell."""
+        with self._cells_lock:
+            self._cells.pop(id(cell), None)
+            self._merge(self._retired, cell.items())
+
+    def _merge(self, into: dict, items) -> None:
+        raise NotImplementedError
+
+    def _snapshot(self) -> list:
+        with self._cells_lock:
+            cells = list(self._cells.values())
+            retired = copy.deepcopy(self._retired) # Small: one entry per label set
+        return [list(retired.items())] + [list(cell.items()) for cell in cells] # Copying a dict's items holds the GIL, so no torn reads
+
+
+class _CellHolder:
+    """Thread-local object whose finalizer retires the thread's cell."""
+
+    __slots__ = ("__weakref__",)
+
+
+class Counter(_PerThreadMetric):
+    """Monotonic counter, optionally labelled."""
+
+    kind = "counter"
+
+    def inc(self, *labels, amount=1) -> None:
+        cell = self._cell()
+        cell[labels] = cell.get(labels, 0) + amount
+
+    def _merge(self, into: dict, items) -> None:
+        for labels, value in items:
+            into[labels] = into.get(labels, 0) + value
+
+    def values(self) -> dict:
+        totals = {}
+        for items in self._snapshot():
+            self._merge(totals, items)
+        return totals
+
+    def render(self) -> list:
+        values = self.values()
+        if not values and not self.labelnames:
+            values = {(): 0} # An unlabelled counter is reported as 0 before its first increment
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in sorted(values.items())]
+
+
+class Histogram(_PerThreadMetric):
+    """Bucketed distribution (e.g. latency in seconds), optionally labelled."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels) -> None:
+        cell = self._cell()
+        state = cell.get(labels)
+        if state is None:
+            state = cell[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0] # Per-bucket counts (+Inf last), sum, count
+        state[0][bisect.bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def _merge(self, into: dict, items) -> None:
+        for labels, (counts, total, count) in items:
+            state = into.setdefault(labels, [[0] * (len(self.buckets) + 1), 0.0, 0])
+            for i, c in enumerate(counts):
+                state[0][i] += c
+            state[1] += total
+            state[2] += count
+
+    def render(self) -> list:
+        merged = {}
+        for items in self._snapshot():
+            self._merge(merged, items)
+        lines = []
+        for labels, (counts, total, count) in sorted(merged.items()):
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                cumulative += c
+                le = _format_labels(self.labelnames, labels, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Gauge:
+    """Value read from a callback at scrape time (a number, or a dict of label tuple -> number)."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, callback, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._callback = callback
+        if registry is not None:
+            registry.append(self)
+
+    def render(self) -> list:
+        value = self._callback()
+        if not isinstance(value, dict):
+            value = {(): value}
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(v)}"
+                for labels, v in sorted(value.items())]
+
+
+def render(registry=REGISTRY) -> str:
+    """Render every registered metric in the Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    for metric in registry:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# --- Shared Application Metrics ---
+STAGE_SECONDS = Histogram("puzzle_stage_seconds", "Time spent in each stage of building a puzzle", ["stage"])
@@ -0,0 +1,116 @@
+import functools
+import os
+import string
+
+import patterns
+from patterns import ALL_PATTERNS
+
+
+# --- Position-wise Patterns ---
+# Patterns whose output letter depends only on (position, input letter), so they
+# can be replaced by one 26-entry table per position. Everything else (swaps,
+# sorts, word-dependent shifts) keeps running the reference implementation.
+WORD_LENGTH = 5 # Puzzle words are 5 letters unless a length is asked for
+MIN_WORD_LENGTH, MAX_WORD_LENGTH = 4, 12 # Lengths the compiled tables are generated for on demand
+LENGTH_TABLE_CACHE_SIZE = int(os.environ.get("LENGTH_TABLE_CACHE_SIZE", 512)) # (pattern, length) tables kept compiled
+ALPHABET = string.ascii_uppercase # "A".."Z"
+
+POSITION_WISE_PATTERNS = [
+    # Shift family
+    patterns.alternating_shift_2_minus_2,
+    patterns.vowel_consonant_opposite_shift,
+    patterns.position_doubling_shift,
+    patterns.odd_even_position_shift,
+    patterns.position_plus_letter_shift,
+    patterns.vowel_boost_shift,
+    patterns.cumulative_position_shift,
+    patterns.prime_position_shift,
+    patterns.alternating_sign_shift,
+    patterns.vowel_forward_2_consonant_backward_1,
+    patterns.consonant_double_vowel_single_shift,
+    patterns.fibonacci_shift,
+    patterns.ascending_shift_by_letter_index,
+    # Reflect family
+    patterns.reverse_alphabet_substitution,
+    patterns.reverse_alphabet_cipher,
+    patterns.consonant_reverse_reflection_old,
+    patterns.alphabet_reflect_by_position,
+    patterns.even_position_reflection_old,
+    patterns.consonant_reverse_reflection,
+    patterns.alphabet_reflect_by_position_new,
+    patterns.even_position_reflection_new,
+    patterns.all_vowel_reflection,
+    # Multiply / mod family
+    patterns.double_index_mod_26,
+    patterns.constant_multiply_by_2,
+    patterns.position_multiply_by_3,
+    patterns.index_square_mod_26,
+    patterns.position_index_product,
+    patterns.letter_index_double_mod_10,
+    patterns.consonant_index_triple_mod_26,
+]
+
+
+def is_compilable_word(word: str, length: int = WORD_LENGTH) -> bool:
+    """True if the compiled tables cover this word (`length` uppercase A-Z letters)."""
+    return len(word) == length and word.isascii() and word.isalpha() and word.isupper()
+
+
+class CompiledPattern:
+    """A position-wise pattern precomputed into per-position lookup tables."""
+
+    def __init__(self, func, tables):
+        self.func = func # Reference implementation, used for inputs the tables do not cover
+        self.__name__ = func.__name__
+        self.tables = tuple(tables) # One 26-character output string per position, indexed by letter (A=0)
+        self.length = len(self.tables) # Word length these tables were generated for
+        if all(table == self.tables[0] for table in self.tables):
+            # Same mapping at every position: a single str.translate map does the whole word
+            self._translate = str.maketrans(ALPHABET, self.tables[0])
+            self._lookups = None
+        else:
+            self._translate = None
+            self._lookups = tuple(dict(zip(ALPHABET, table)) for table in self.tables) # char -> char, per position
+
+    def apply(self, word: str) -> str:
+        """Transform a word with one table walk, matching the reference function exactly."""
+        if not is_compilable_word(word, self.length):
+            if MIN_WORD_LENGTH <= len(word) <= MAX_WORD_LENGTH and is_compilable_word(word, len(word)):
+                return compile_for_length(self.func, len(word)).apply(word) # Tables for this length, built once
+            return self.func(word) # Lowercase, non-letters or unsupported lengths: defer to the reference
+        if self._translate is not None:
+            return word.translate(self._translate)
+        return "".join(map(dict.__getitem__, self._lookups, word))
+
+    __call__ = apply
+
+    def __repr__(self):
+        return f"CompiledPattern({self.__name__})"
+
+
+def compile_pattern(func, length: int = WORD_LENGTH) -> CompiledPattern:
+    """Build the per-position tables for a position-wise pattern by probing the reference function."""
+    columns = [func(letter * length) for letter in ALPHABET] # Output column for each letter at every position
+    tables = ["".join(column[i] for column in columns) for i in range(length)]
+    return CompiledPattern(func, tables)
+
+
+# --- Compiled Forms (built once at import) ---
+COMPILED_PATTERNS = {func: compile_pattern(func) for func in POSITION_WISE_PATTERNS} # Reference function -> compiled form
+
+
+@functools.lru_cache(maxsize=LENGTH_TABLE_CACHE_SIZE)
+def compile_for_length(func, length: int) -> CompiledPattern:
+    """Compiled tables for another word length, generated on first use and kept in a bounded cache."""
+    if length == WORD_LENGTH and func in COMPILED_PATTERNS:
+        return COMPILED_PATTERNS[func]
+    return compile_pattern(func, length)
+
+
+def compiled(func):
+    """Return the fastest equivalent callable for a pattern (compiled if position-wise, else the reference)."""
+    return COMPILED_PATTERNS.get(func, func)
+
+
+# Same order as ALL_PATTERNS, with position-wise entries swapped for their compiled forms
+ALL_COMPILED_PATTERNS = [compiled(func) for func in ALL_PATTERNS]
@@ -0,0 +1,114 @@
+import operator
+
+import patterns
+from pattern_compiler import ALPHABET, COMPILED_PATTERNS, WORD_LENGTH, compiled, is_compilable_word
+
+
+# --- Pattern Composition ---
+# Every word-independent step can be written as (order, tables): output position i
+# takes input letter word[order[i]] and maps it through tables[i]. Two such steps
+# compose into one more step of the same shape, so a chain of any length collapses
+# into a single permutation plus one table lookup per letter. Word-dependent
+# patterns (vowel swaps, sorts, count-based shifts) break a chain into fused runs
+# that are applied one after another.
+IDENTITY_ORDER = tuple(range(WORD_LENGTH))
+IDENTITY_TABLES = (ALPHABET,) * WORD_LENGTH
+
+PERMUTATION_PATTERNS = { # Reference function -> fixed source position for each output position
+    patterns.letter_pair_swap: (1, 0, 3, 2, 4),
+    patterns.first_last_swap: (4, 1, 2, 3, 0),
+    patterns.middle_three_reverse: (0, 3, 2, 1, 4),
+}
+
+
+class FusedPattern:
+    """A chain of word-independent patterns collapsed into one permutation and per-position tables."""
+
+    def __init__(self, funcs, order, tables):
+        self.funcs = tuple(funcs) # Reference chain, used for inputs the tables do not cover
+        self.__name__ = "+".join(func.__name__ for func in self.funcs)
+        self.order = tuple(order) # Output position -> input position
+        self.tables = tuple(tables) # One 26-character output string per output position
+        self._gather = operator.itemgetter(*self.order)
+        self._lookups = tuple(dict(zip(ALPHABET, table)) for table in self.tables)
+
+    def apply(self, word: str) -> str:
+        """Transform a word with one gather and one table walk, matching the chain exactly."""
+        if not is_compilable_word(word):
+            for func in self.funcs:
+                word = compiled(func)(word) # Other lengths still get per-length tables for each step
+            return word
+        return "".join(map(dict.__getitem__, self._lookups, self._gather(word)))
+
+    __call__ = apply
+
+    def __repr__(self):
+        return f"FusedPattern({self.__name__})"
+
+
+def fusable_form(func):
+    """(order, tables) for a word-independent pattern, or None if the pattern depends on the word."""
+    compiled_pattern = COMPILED_PATTERNS.get(func)
+    if compiled_pattern is not None:
+        return IDENTITY_ORDER, compiled_pattern.tables
+    order = PERMUTATION_PATTERNS.get(func)
+    if order is not None:
+        return order, IDENTITY_TABLES
+    return None
+
+
+def fuse_forms(first, second):
+    """Compose two (order, tables) steps: the result applies first, then second."""
+    order_a, tables_a = first
+    order_b, tables_b = second
+    order = tuple(order_a[j] for j in order_b) # Output i of b reads output order_b[i] of a
+    tables = tuple(
+        "".join(tables_b[i][ALPHABET.index(c)] for c in tables_a[j]) # b's table applied to every output of a's table
+        for i, j in enumerate(order_b)
+    )
+    return order, tables
+
+
+class ComposedPattern:
+    """A chain of patterns: fusable runs are collapsed, word-dependent steps run on their own."""
+
+    def __init__(self, funcs):
+        self.funcs = tuple(funcs)
+        if not self.funcs:
+            raise ValueError("A composed pattern needs at least one step.")
+        self.__name__ = "+".join(func.__name__ for func in self.funcs)
+        self.steps = tuple(_fuse_runs(self.funcs)) # Callables applied in sequence (each one fused where possible)
+
+    def apply(self, word: str) -> str:
+        for step in self.steps:
+            word = step(word)
+        return word
+
+    __call__ = apply
+
+    def __repr__(self):
+        return f"ComposedPattern({self.__name__})"
+
+
+def _fuse_runs(funcs):
+    run, form = [], None
+    for func in funcs:
+        step_form = fusable_form(func)
+        if step_form is None:
+            if run:
+                yield FusedPattern(run, *form)
+                run, form = [], None
+            yield func # Word-dependent: applied on its own, between fused runs
+            continue
+        form = step_form if form is None else fuse_forms(form, step_form)
+        run.append(func)
+    if run:
+        yield FusedPattern(run, *form)
+
+
+def compose(*funcs):
+    """Build a single callable equivalent to applying funcs left to right."""
+    composed = ComposedPattern(funcs)
+    if len(composed.steps) == 1:
+        return composed.steps[0] # Fully fused (or a single word-dependent step): skip the chain loop
+    return composed
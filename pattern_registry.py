@@ -0,0 +1,126 @@
+import hashlib
+
+import patterns
+from patterns import ALL_PATTERNS
+from pattern_compiler import COMPILED_PATTERNS
+from pattern_fusion import IDENTITY_ORDER, fusable_form
+
+
+# --- Pattern Registry ---
+# Metadata for every pattern in ALL_PATTERNS, plus duplicate detection: word-independent
+# patterns are fingerprinted by their compiled (order, tables) form over the whole
+# alphabet, so two patterns with the same fingerprint produce the same output for every
+# 5-letter word. Only the first pattern of each such group (in ALL_PATTERNS order) is
+# canonical; the others are aliases that are neither served nor precomputed.
+WORD_DEPENDENT_INVERTIBLE = { # Word-dependent patterns checked to be one-to-one over all 26^5 words
+    patterns.vowel_swap_0_2,
+    patterns.palindrome_or_reverse,
+    patterns.vowel_position_swap,
+}
+DIFFICULTY_SUBSTITUTION = 1 # One letter mapping applied at every position
+DIFFICULTY_POSITIONAL = 2 # Mapping or letter order depends on the position
+DIFFICULTY_WORD_DEPENDENT = 3 # Mapping depends on the rest of the word
+LENGTH_PROBES = { # Word length -> probe words used to check that a pattern handles other lengths
+    4: ["BEAD", "STIR", "OPAL"],
+    7: ["BRISKET", "OUTAGES", "ANIMATE"],
+    12: ["BREADSTICKSX", "OUTAGEQUIRKY", "ANEMOMETRIES"],
+}
+
+
+class PatternInfo:
+    """What the registry knows about one pattern."""
+
+    def __init__(self, func, position_wise, word_dependent, invertible, length_generic, fingerprint, difficulty):
+        self.func = func
+        self.name = func.__name__
+        self.position_wise = position_wise # Output letter depends only on (position, input letter)
+        self.word_dependent = word_dependent # Cannot be fused: the mapping depends on the rest of the word
+        self.invertible = invertible # Every 5-letter output has exactly one original
+        self.length_generic = length_generic # The reference function transforms words of other lengths too
+        self.fingerprint = fingerprint # Digest of the compiled form, or None for word-dependent patterns
+        self.difficulty = difficulty # 1 (plain substitution) .. 3 (word-dependent), used to weight scheduling
+        self.canonical = func # Representative of this pattern's equivalence group (set by the registry)
+
+    @property
+    def is_canonical(self) -> bool:
+        return self.canonical is self.func
+
+    def __repr__(self):
+        return f"PatternInfo({self.name})"
+
+
+def fingerprint(form) -> str:
+    """Stable digest of an (order, tables) form."""
+    order, tables = form
+    return hashlib.blake2b(",".join(map(str, order)).encode() + b"|" + "|".join(tables).encode(), digest_size=12).hexdigest()
+
+
+def is_length_generic(func) -> bool:
+    """True if func returns a same-length, changed word for some probe at every probe length."""
+    for length, probes in LENGTH_PROBES.items():
+        changed = False
+        for word in probes:
+            try:
+                out = func(word)
+            except Exception:
+                return False # Written for 5-letter words only (e.g. indexes a fixed shift list)
+            if len(out) != length:
+                return False
+            changed = changed or out != word
+        if not changed:
+            return False # Returns other lengths unchanged
+    return True
+
+
+def describe(func) -> PatternInfo:
+    """Build the registry entry for one pattern."""
+    form = fusable_form(func)
+    if form is None:
+        invertible = func in WORD_DEPENDENT_INVERTIBLE
+        difficulty = DIFFICULTY_WORD_DEPENDENT
+    else:
+        order, tables = form
+        invertible = all(len(set(table)) == len(table) for table in tables) # Permutation order, bijective tables
+        uniform = order == IDENTITY_ORDER and len(set(tables)) == 1
+        difficulty = DIFFICULTY_SUBSTITUTION if uniform else DIFFICULTY_POSITIONAL
+    return PatternInfo(
+        func,
+        position_wise=func in COMPILED_PATTERNS,
+        word_dependent=form is None,
+        invertible=invertible,
+        length_generic=is_length_generic(func),
+        fingerprint=fingerprint(form) if form is not None else None,
+        difficulty=difficulty,
+    )
+
+
+def build_registry(pattern_funcs=ALL_PATTERNS) -> dict:
+    """Pattern name -> PatternInfo, with each entry's canonical representative resolved."""
+    registry = {}
+    first_by_fingerprint = {}
+    for func in pattern_funcs:
+        info = describe(func)
+        if info.fingerprint is not None:
+            info.canonical = first_by_fingerprint.setdefault(info.fingerprint, func)
+        registry[info.name] = info
+    return registry
+
+
+# --- Registry (built once at import) ---
+REGISTRY = build_registry()
+CANONICAL_PATTERNS = [info.func for info in REGISTRY.values() if info.is_canonical] # Same order as ALL_PATTERNS
+ALIASES = {name: info.canonical.__name__ for name, info in REGISTRY.items() if not info.is_canonical} # Alias -> canonical name
+
+
+def canonical(name: str):
+    """The canonical function for a pattern name (aliases included), or None if the name is unknown."""
+    info = REGISTRY.get(name)
+    return info.canonical if info is not None else None
+
+
+if __name__ == "__main__":
+    for info in REGISTRY.values():
+        flags = [flag for flag in ("position_wise", "word_dependent", "invertible", "length_generic") if getattr(info, flag)]
+        alias = "" if info.is_canonical else f" -> alias of {info.canonical.__name__}"
+        print(f"{info.name}: difficulty {info.difficulty}, {', '.join(flags) or '-'}{alias}")
+    print(f"{len(CANONICAL_PATTERNS)} canonical of {len(REGISTRY)} patterns")
@@ -0,0 +1,110 @@
+import os
+import random
+import threading
+import time
+
+from pattern_registry import CANONICAL_PATTERNS, REGISTRY
+
+
+# --- Pattern Scheduler ---
+# Patterns are drawn from weighted shuffle bags: each pass through a bag serves every
+# pattern `weight` times in random order. A draw is one swap and a list pop (the bag
+# is shuffled lazily), and refilling is a single list copy per pass. There is one bag
+# per session stage; a client moves to the next stage every SCHEDULER_STAGE_LENGTH
+# puzzles, and later stages weight harder patterns (registry difficulty) more heavily.
+# Bags are shared by all clients; each client's session only remembers its draw count,
+# its last few patterns (which are never repeated) and when it last drew. A session
+# idle for SCHEDULER_SESSION_IDLE seconds starts again from stage 0.
+SCHEDULER_NO_REPEAT = int(os.environ.get("SCHEDULER_NO_REPEAT", 3)) # Patterns a client cannot get again within this many draws
+SCHEDULER_STAGE_LENGTH = int(os.environ.get("SCHEDULER_STAGE_LENGTH", 10)) # Puzzles per session stage
+SCHEDULER_SESSION_IDLE = int(os.environ.get("SCHEDULER_SESSION_IDLE", 1800)) # Seconds without a draw before a session's stage resets
+SCHEDULER_MAX_STAGE = 3 # Weights stop changing after this stage
+MAX_REDRAWS = 8 # Bag draws tried before falling back to a direct pick (only when the bag is nearly all excluded)
+
+
+def stage_weight(difficulty: int, stage: int) -> int:
+    """Bag copies of a pattern: 1 for everything at stage 0, growing with difficulty in later stages."""
+    return 1 + stage * (difficulty - 1)
+
+
+class ShuffleBag:
+    """Weighted shuffle bag: every item appears `weight` times per pass, in random order."""
+
+    def __init__(self, weighted_items):
+        self._items = [item for item, _ in weighted_items]
+        self._template = [item for item, weight in weighted_items for _ in range(weight)]
+        if not self._template:
+            raise ValueError("A shuffle bag needs at least one item with a positive weight.")
+        self._bag = []
+        self._lock = threading.Lock()
+
+    def draw(self, exclude=()):
+        """Take the next item not in exclude (a small collection, e.g. a client's recent items)."""
+        with self._lock:
+            bag = self._bag
+            for _ in range(MAX_REDRAWS):
+                if not bag:
+                    bag = self._bag = self._template[:] # Refill; shuffled lazily, one swap per draw
+                i = random.randrange(len(bag))
+                bag[i], bag[-1] = bag[-1], bag[i] # Fisher-Yates step: a uniformly random remaining item goes last
+                item = bag.pop()
+                if item not in exclude:
+                    return item
+                bag.append(item) # Not for this client: leave it in the bag for someone else
+        allowed = [item for item in self._items if item not in exclude]
+        return random.choice(allowed or self._items)
+
+    def __len__(self):
+        return len(self._bag)
+
+
+class Session:
+    """A client's scheduling state: puzzles drawn so far, the most recent pattern names and the last draw time."""
+
+    def __init__(self, draws: int = 0, recent=(), seen: int = 0):
+        self.draws = draws
+        self.recent = tuple(recent) # Oldest first
+        self.seen = seen # Unix time of the last draw (0: never)
+
+    def encode(self) -> str:
+        """Compact text form, kept in the pattern state store."""
+        return f"{self.draws}:{','.join(self.recent)}:{self.seen}"
+
+    @classmethod
+    def decode(cls, text):
+        if not text:
+            return cls()
+        draws, sep, rest = text.partition(":")
+        if not sep or not draws.isdigit():
+            return cls(recent=[text]) # Stored before sessions existed: just the last pattern name
+        names, _, seen = rest.partition(":") # No last-seen time (older format) reads as long idle
+        return cls(int(draws), names.split(",") if names else (), int(seen) if seen.isdigit() else 0)
+
+
+class PatternScheduler:
+    """Difficulty-weighted, no-repeat-window pattern selection with O(1) draws."""
+
+    def __init__(self, pattern_funcs=CANONICAL_PATTERNS, no_repeat: int = SCHEDULER_NO_REPEAT,
+                 stage_length: int = SCHEDULER_STAGE_LENGTH, max_stage: int = SCHEDULER_MAX_STAGE, difficulty=None,
+                 idle_reset: int = SCHEDULER_SESSION_IDLE):
+        funcs = list(pattern_funcs)
+        difficulty = difficulty or {func: REGISTRY[func.__name__].difficulty for func in funcs} # Function -> 1..3
+        self.no_repeat = max(0, min(no_repeat, len(funcs) - 1)) # Leave at least one pattern to draw
+        self.stage_length = max(1, stage_length)
+        self.idle_reset = idle_reset
+        self._bags = [ShuffleBag([(func.__name__, stage_weight(difficulty[func], stage)) for func in funcs])
+                      for stage in range(max_stage + 1)]
+        self._by_name = {func.__name__: func for func in funcs}
+
+    def stage(self, session: Session) -> int:
+        return min(session.draws // self.stage_length, len(self._bags) - 1)
+
+    def draw(self, session: Session, now=None) -> tuple:
+        """Pick the next pattern for a session; returns (pattern function, updated session)."""
+        now = int(time.time()) if now is None else now
+        if now - session.seen > self.idle_reset: # Back after a break (or a new player on a shared id): start easy again
+            session = Session(0, session.recent, now)
+        recent = session.recent[-self.no_repeat:] if self.no_repeat else ()
+        name = self._bags[self.stage(session)].draw(recent)
+        window = (recent + (name,))[-self.no_repeat:] if self.no_repeat else ()
+        return self._by_name[name], Session(session.draws + 1, window, now)
@@ -0,0 +1,116 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from app_logging import get_logger
+from metrics import Counter
+
+
+# --- Recent Pattern State Configuration ---
+PATTERN_STATE_BACKEND = os.environ.get("PATTERN_STATE_BACKEND", "memory") # "memory" (one process) or "sqlite" (shared by workers)
+PATTERN_STATE_CAPACITY = int(os.environ.get("PATTERN_STATE_CAPACITY", 100000)) # Clients remembered before the oldest is evicted
+PATTERN_STATE_PATH = os.environ.get("PATTERN_STATE_PATH", "pattern_state.sqlite3") # SQLite file shared by gunicorn workers
+PATTERN_STATE_SHARDS = 16 # Independent locks, so request threads rarely contend on the same one
+
+logger = get_logger("pattern_state")
+STATE_ERRORS = Counter("pattern_state_errors_total", "Pattern state reads/writes skipped because the store was busy", ["op"])
+
+
+class LRUPatternStore:
+    """In-process, bounded LRU of client id -> pattern state (encoded scheduler session), sharded to avoid one global lock."""
+
+    def __init__(self, capacity: int = PATTERN_STATE_CAPACITY, shards: int = PATTERN_STATE_SHARDS):
+        self._shard_capacity = max(1, capacity // shards)
+        self._shards = [(threading.Lock(), OrderedDict()) for _ in range(shards)]
+
+    def _shard(self, client_id: str):
+        return self._shards[hash(client_id) % len(self._shards)]
+
+    def get(self, client_id: str):
+        """Return the pattern state stored for this client, or None."""
+        lock, entries = self._shard(client_id)
+        with lock:
+            session = entries.get(client_id)
+            if session is not None:
+                entries.move_to_end(client_id) # Mark as recently used
+            return session
+
+    def set(self, client_id: str, session: str) -> None:
+        lock, entries = self._shard(client_id)
+        with lock:
+            entries[client_id] = session
+            entries.move_to_end(client_id)
+            if len(entries) > self._shard_capacity:
+                entries.popitem(last=False) # Evict the least recently used client in this shard
+
+    def __len__(self):
+        return sum(len(entries) for _, entries in self._shards)
+
+
+class SQLitePatternStore:
+    """Client id -> pattern state in a WAL-mode SQLite file, shared by every worker process."""
+
+    def __init__(self, path: str = PATTERN_STATE_PATH, capacity: int = PATTERN_STATE_CAPACITY):
+        self._path = path
+        self._capacity = capacity
+        self._local = threading.local() # One connection per thread; sqlite3 connections are not shared across threads
+        self._writes = 0
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS recent_patterns ("
+                         "client_id TEXT PRIMARY KEY, session TEXT NOT NULL, updated_at REAL NOT NULL)")
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(recent_patterns)")}
+            if "pattern_name" in columns: # Written before sessions: the column held a bare pattern name, which Session.decode still reads
+                conn.execute("ALTER TABLE recent_patterns RENAME COLUMN pattern_name TO session")
+            conn.execute("CREATE INDEX IF NOT EXISTS recent_patterns_updated ON recent_patterns (updated_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid(): # Never reuse a connection inherited across fork
+            conn = sqlite3.connect(self._path, timeout=1.0, isolation_level=None) # Autocommit: each statement is its own transaction
+            conn.execute("PRAGMA journal_mode=WAL") # Readers never block the writer and vice versa
+            conn.execute("PRAGMA synchronous=NORMAL") # Losing the last few updates on power loss is acceptable here
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, client_id: str):
+        """Return the pattern state stored for this client, or None (also if the database is busy)."""
+        try:
+            row = self._connect().execute(
+                "SELECT session FROM recent_patterns WHERE client_id = ?", (client_id,)).fetchone()
+        except sqlite3.OperationalError as e: # Locked past the timeout: serve the client as if it were new
+            STATE_ERRORS.inc("get")
+            logger.warning("Could not read pattern state: %s", e)
+            return None
+        return row[0] if row else None
+
+    def set(self, client_id: str, session: str) -> None:
+        """Store this client's pattern state; skipped (not an error for the request) if the database is busy."""
+        conn = self._connect()
+        try:
+            conn.execute("INSERT INTO recent_patterns (client_id, session, updated_at) VALUES (?, ?, ?) "
+                         "ON CONFLICT (client_id) DO UPDATE SET session = excluded.session, updated_at = excluded.updated_at",
+                         (client_id, session, time.time()))
+        except sqlite3.OperationalError as e: # Locked past the timeout: the client may see a repeat, but gets its puzzle
+            STATE_ERRORS.inc("set")
+            logger.warning("Could not save pattern state: %s", e)
+            return
+        self._writes += 1
+        if self._writes % 1000 == 0: # Occasionally trim to capacity, keeping the most recently updated clients
+            try:
+                conn.execute("DELETE FROM recent_patterns WHERE updated_at <= ("
+                             "SELECT updated_at FROM recent_patterns ORDER BY updated_at DESC LIMIT 1 OFFSET ?)",
+                             (self._capacity,))
+            except sqlite3.OperationalError as e: # Retried at the next thousandth write
+                STATE_ERRORS.inc("trim")
+                logger.warning("Could not trim pattern state: %s", e)
+
+
+def make_store(backend: str = PATTERN_STATE_BACKEND):
+    """Build the recent-pattern store selected by PATTERN_STATE_BACKEND."""
+    if backend == "memory":
+        return LRUPatternStore()
+    if backend == "sqlite":
+        return SQLitePatternStore()
+    raise ValueError(f"Unknown PATTERN_STATE_BACKEND: {backend!r} (expected 'memory' or 'sqlite')")
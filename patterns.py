@@ -1,11 +1,19 @@
+import functools
+import itertools
+import logging
+import operator
 import random # Import random for potential use in patterns (though not heavily used in current ones)
 
+from app_logging import get_logger
+
+logger = get_logger("patterns") # Debug output goes through the app's queue-based logger instead of stdout
+
 
 # --- Helper Functions ---
 MOD_26 = 26 # Constant for modulo 26, used for wrapping around the alphabet (A-Z)
 ASCII_A_UPPER = ord('A') # ASCII value of 'A' (65), used as a base for character-to-index conversion
 VOWELS = "AEIOU" # String of uppercase vowels
-PRIMES = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71, 73] # List of prime numbers, more than enough for 5-letter words
+PARAMETER_CACHE_SIZE = 32 # Word lengths whose per-position parameters stay memoized (4-12 letters need 9)
 
 
 def is_vowel(char: str) -> bool: # Function to check if a character is a vowel
@@ -32,12 +40,66 @@ def reflect_char(char: str) -> str: # Function to reflect a character across the
     return char # Return non-alphabetic characters unchanged
 
 
+# --- Per-position Parameters (generated for any word length, memoized per length) ---
+@functools.lru_cache(maxsize=PARAMETER_CACHE_SIZE)
+def alternating_shifts(length: int, odd: int, even: int) -> tuple: # (odd, even, odd, ...) for 1-based positions
+    return tuple(odd if i % 2 == 0 else even for i in range(length))
+
+
+@functools.lru_cache(maxsize=PARAMETER_CACHE_SIZE)
+def doubled_position_shifts(length: int) -> tuple: # (2, 4, 6, ...): twice the 1-based position
+    return tuple(2 * (i + 1) for i in range(length))
+
+
+@functools.lru_cache(maxsize=PARAMETER_CACHE_SIZE)
+def offset_position_shifts(length: int, offset: int) -> tuple: # (1 + offset, 2 + offset, ...): the 1-based position plus a constant
+    return tuple(i + 1 + offset for i in range(length))
+
+
+@functools.lru_cache(maxsize=PARAMETER_CACHE_SIZE)
+def triangular_shifts(length: int) -> tuple: # (1, 3, 6, 10, ...): the sum of the 1-based positions up to each one
+    return tuple(itertools.accumulate(range(1, length + 1)))
+
+
+@functools.lru_cache(maxsize=PARAMETER_CACHE_SIZE)
+def alternating_sign_shifts(length: int) -> tuple: # (1, -2, 3, -4, ...): 1-based position with alternating sign
+    return tuple((i + 1) if i % 2 == 0 else -(i + 1) for i in range(length))
+
+
+@functools.lru_cache(maxsize=PARAMETER_CACHE_SIZE)
+def pair_swap_gather(length: int): # Picks letters 2, 1, 4, 3, ... (an odd last letter stays in place)
+    order = [i + 1 if i % 2 == 0 else i - 1 for i in range(length)]
+    if length % 2: order[-1] = length - 1
+    return operator.itemgetter(*order)
+
+
+@functools.lru_cache(maxsize=PARAMETER_CACHE_SIZE)
+def primes(count: int) -> tuple: # The first `count` primes (2, 3, 5, 7, 11, ...)
+    found = []
+    candidate = 2
+    while len(found) < count:
+        if all(candidate % p for p in found if p * p <= candidate): # Trial division by the primes found so far
+            found.append(candidate)
+        candidate += 1
+    return tuple(found)
+
+
+@functools.lru_cache(maxsize=PARAMETER_CACHE_SIZE)
+def fibonacci(count: int) -> tuple: # The first `count` Fibonacci numbers (1, 1, 2, 3, 5, ...)
+    numbers = [1, 1][:count]
+    while len(numbers) < count:
+        numbers.append(numbers[-1] + numbers[-2])
+    return tuple(numbers)
+
+
+PRIMES = list(primes(21)) # Kept for callers of the old fixed table; patterns use primes(len(word))
+FIBONACCI = list(fibonacci(8)) # Kept for callers of the old fixed table; patterns use fibonacci(len(word))
 
 
 # 1. Alternating Shift (+2, -2)
 def alternating_shift_2_minus_2(word: str) -> str: # Pattern: shifts letters at alternating positions by +2 and -2
     transformed = list(word) # Convert the word to a list of characters for mutability
-    shifts = [2, -2, 2, -2, 2] # Define the shift values for each of the 5 positions
+    shifts = alternating_shifts(len(word), 2, -2) # Shift values per position: +2, -2, +2, ...
     for i in range(len(word)): # Iterate through each character by its index
         transformed[i] = shift_char(word[i], shifts[i]) # Apply the specific shift to the character at current index
     return "".join(transformed) # Join the list of characters back into a string
@@ -59,7 +121,7 @@ def vowel_consonant_opposite_shift(word: str) -> str: # Pattern: shifts vowels f
 # 3. Position Doubling Shift
 def position_doubling_shift(word: str) -> str: # Pattern: shifts each letter by double its 1-based position
     transformed = [] # Initialize an empty list
-    shifts = [2, 4, 6, 8, 10] # Define shifts: (1*2), (2*2), (3*2), (4*2), (5*2)
+    shifts = doubled_position_shifts(len(word)) # Define shifts: (1*2), (2*2), (3*2), ...
     for i in range(len(word)): # Iterate through each character by its index
         transformed.append(shift_char(word[i], shifts[i])) # Apply the position-doubled shift
     return "".join(transformed) # Join the list of characters
@@ -68,7 +130,7 @@ def position_doubling_shift(word: str) -> str: # Pattern: shifts each letter by
 # 4. Odd/Even Position Shift
 def odd_even_position_shift(word: str) -> str: # Pattern: shifts letters at odd positions by +1, even by +3
     transformed = [] # Initialize an empty list
-    shifts = [1, 3, 1, 3, 1] # Define shifts: +1 for 1st, 3rd, 5th; +3 for 2nd, 4th (1-based positions)
+    shifts = alternating_shifts(len(word), 1, 3) # Define shifts: +1 for odd, +3 for even (1-based positions)
     for i in range(len(word)): # Iterate through each character by its index
         transformed.append(shift_char(word[i], shifts[i])) # Apply the specific shift
     return "".join(transformed) # Join the list of characters
@@ -89,7 +151,7 @@ def reverse_alphabet_substitution(word: str) -> str: # Pattern: substitutes each
 # 6. Position Plus Letter Shift
 def position_plus_letter_shift(word: str) -> str: # Pattern: shifts each letter by its 1-based position plus a constant
     transformed = [] # Initialize an empty list
-    shifts = [i + 2 for i in range(len(word))] # Define shifts: (0+2)=2, (1+2)=3, (2+2)=4, (3+2)=5, (4+2)=6 (1-based position + 1)
+    shifts = offset_position_shifts(len(word), 1) # Define shifts: 2, 3, 4, 5, 6, ... (1-based position + 1)
     for i in range(len(word)): # Iterate through each character by its index
         transformed.append(shift_char(word[i], shifts[i])) # Apply the calculated shift
     return "".join(transformed) # Join the list of characters
@@ -111,12 +173,8 @@ def vowel_boost_shift(word: str) -> str: # Pattern: shifts vowels by a larger am
 # 8. Cumulative Position Shift
 def cumulative_position_shift(word: str) -> str: # Pattern: each letter's shift is the sum of its position and all previous positions
     transformed = [] # Initialize an empty list
-    cumulative_sum = 0 # Initialize cumulative sum for shifts
-    shifts = [0] * len(word) # Create a list to store calculated shifts for each position
-    for i in range(len(word)): # Iterate through each position (0-based index)
-        cumulative_sum += (i + 1) # Add the 1-based position to the cumulative sum
-        shifts[i] = cumulative_sum # Store the cumulative sum as the shift for this position
-    for i in range(len(word)): # Iterate again to apply the shifts
+    shifts = triangular_shifts(len(word)) # Define shifts: 1, 1+2=3, 1+2+3=6, ... (running sum of 1-based positions)
+    for i in range(len(word)): # Iterate through each position to apply the shifts
         transformed.append(shift_char(word[i], shifts[i])) # Apply the cumulative shift
     return "".join(transformed) # Join the list of characters
 
@@ -124,17 +182,16 @@ def cumulative_position_shift(word: str) -> str: # Pattern: each letter's shift
 # 9. Prime Position Shift
 def prime_position_shift(word: str) -> str: # Pattern: shifts each letter by the prime number corresponding to its position
     transformed = [] # Initialize an empty list
-    if len(word) > len(PRIMES): # Check if there are enough prime numbers defined for the word length
-        raise ValueError("Not enough prime numbers defined for word length.") # Raise an error if not
+    shifts = primes(len(word)) # One prime per position, generated for this word length
     for i in range(len(word)): # Iterate through each character by its index
-        transformed.append(shift_char(word[i], PRIMES[i])) # Apply the prime number shift
+        transformed.append(shift_char(word[i], shifts[i])) # Apply the prime number shift
     return "".join(transformed) # Join the list of characters
 
 
 # 10. Alternating Sign Shift
 def alternating_sign_shift(word: str) -> str: # Pattern: shifts letters by increasing amounts with alternating positive/negative signs
     transformed = [] # Initialize an empty list
-    shifts = [1, -2, 3, -4, 5] # Define the specific alternating shifts
+    shifts = alternating_sign_shifts(len(word)) # Define the alternating shifts: 1, -2, 3, -4, ...
     for i in range(len(word)): # Iterate through each character by its index
         transformed.append(shift_char(word[i], shifts[i])) # Apply the alternating shift
     return "".join(transformed) # Join the list of characters
@@ -143,12 +200,9 @@ def alternating_sign_shift(word: str) -> str: # Pattern: shifts letters by incre
 
 
 # 11. Letter Pair Swap
-def letter_pair_swap(word: str) -> str: # Pattern: swaps letters in pairs (1st with 2nd, 3rd with 4th)
-    if len(word) != 5: return word # Only apply if word is 5 characters long, otherwise return unchanged
-    transformed = list(word) # Convert to list for swapping
-    transformed[0], transformed[1] = transformed[1], transformed[0] # Swap first two characters
-    transformed[2], transformed[3] = transformed[3], transformed[2] # Swap third and fourth characters
-    return "".join(transformed) # Join the list of characters
+def letter_pair_swap(word: str) -> str: # Pattern: swaps letters in pairs (1st with 2nd, 3rd with 4th, ...)
+    if len(word) < 2: return word # Nothing to swap
+    return "".join(pair_swap_gather(len(word))(word)) # Pick the letters in pair-swapped order
 
 
 # 12. Reverse Alphabet Cipher (Same as Rule 5)
@@ -230,7 +284,7 @@ def vowel_forward_2_consonant_backward_1(word: str) -> str: # Pattern: shifts vo
 
 
 # 19. Middle Three Reverse
-def middle_three_reverse(word: str) -> str: # Pattern: reverses the middle three characters of a 5-letter word
+def middle_three_reverse(word: str) -> str: # Pattern: reverses the three characters after the first (the middle three of a 5-letter word)
     if len(word) < 5: return word # Only apply if word has at least 5 characters
     transformed = list(word) # Convert to list for slicing and reversing
     middle_segment = transformed[1:4] # Extract the middle three characters (indices 1, 2, 3)
@@ -277,13 +331,11 @@ def consonant_double_vowel_single_shift(word: str) -> str: # Pattern: consonants
 
 
 # 23. Fibonacci Shift
-FIBONACCI = [1, 1, 2, 3, 5, 8, 13, 21] # Precompute some Fibonacci numbers
 def fibonacci_shift(word: str) -> str: # Pattern: shifts each letter by the Fibonacci number corresponding to its position
     transformed = [] # Initialize an empty list
-    if len(word) > len(FIBONACCI): # Check if there are enough Fibonacci numbers for the word length
-        raise ValueError("Not enough Fibonacci numbers defined for word length.") # Raise an error if not
+    shifts = fibonacci(len(word)) # One Fibonacci number per position, generated for this word length
     for i in range(len(word)): # Iterate through each character by its index
-        transformed.append(shift_char(word[i], FIBONACCI[i])) # Apply the Fibonacci shift
+        transformed.append(shift_char(word[i], shifts[i])) # Apply the Fibonacci shift
     return "".join(transformed) # Join the list of characters
 
 
@@ -373,7 +425,6 @@ def last_letter_shift(word: str) -> str: # Pattern: shifts all letters in the wo
 
 def consonant_reverse_reflection(word: str) -> str: # Pattern: reflects consonants, leaves vowels unchanged (new version)
     """Reflect consonants using reflect_char; vowels unchanged."""
-    if len(word) != 5: return word # Only apply if word is 5 characters long
     transformed = [] # Initialize an empty list
     for char in word: # Iterate through each character
         if is_consonant(char): # If it's a consonant
@@ -384,8 +435,7 @@ def consonant_reverse_reflection(word: str) -> str: # Pattern: reflects consonan
 
 
 def alphabet_reflect_by_position_new(word: str) -> str: # Pattern: reflects letters at odd positions (1-based), leaves evens unchanged (new version)
-    """Reflect letters in odd positions (1, 3, 5) using reflect_char; even positions unchanged."""
-    if len(word) != 5: return word # Only apply if word is 5 characters long
+    """Reflect letters in odd positions (1, 3, 5, ...) using reflect_char; even positions unchanged."""
     transformed = [] # Initialize an empty list
     for i, char in enumerate(word): # Iterate through characters with their 0-based index
         if (i + 1) % 2 != 0:  # Check if the 1-based position is odd
@@ -396,8 +446,7 @@ def alphabet_reflect_by_position_new(word: str) -> str: # Pattern: reflects lett
 
 
 def even_position_reflection_new(word: str) -> str: # Pattern: reflects letters at even positions (1-based), leaves odds unchanged (new version)
-    """Reflect letters in even positions (2, 4) using reflect_char; odd positions unchanged."""
-    if len(word) != 5: return word # Only apply if word is 5 characters long
+    """Reflect letters in even positions (2, 4, ...) using reflect_char; odd positions unchanged."""
     transformed = [] # Initialize an empty list
     for i, char in enumerate(word): # Iterate through characters with their 0-based index
         if (i + 1) % 2 == 0:  # Check if the 1-based position is even
@@ -409,7 +458,6 @@ def even_position_reflection_new(word: str) -> str: # Pattern: reflects letters
 
 def all_vowel_reflection(word: str) -> str: # Pattern: reflects all vowels, leaves consonants unchanged
     """Reflect all vowels (e.g., A=1→Z=26); consonants unchanged."""
-    if len(word) != 5: return word # Only apply if word is 5 characters long
     transformed = [] # Initialize an empty list
     for char in word: # Iterate through each character
         if is_vowel(char): # If it's a vowel
@@ -421,7 +469,6 @@ def all_vowel_reflection(word: str) -> str: # Pattern: reflects all vowels, leav
 
 def index_square_mod_26(word: str) -> str: # Pattern: squares each letter's alphabetical index, then wraps around alphabet
     """Square each letter’s index, take mod 26, map to a letter."""
-    if len(word) != 5: return word # Only apply if word is 5 characters long
     transformed = [] # Initialize an empty list
     for char in word: # Iterate through each character
         if 'A' <= char <= 'Z': # Check if it's an uppercase letter
@@ -435,7 +482,6 @@ def index_square_mod_26(word: str) -> str: # Pattern: squares each letter's alph
 
 def position_index_product(word: str) -> str: # Pattern: multiplies each letter's index by its 1-based position, then wraps around
     """Multiply each letter’s index by its 1-based position, take mod 26."""
-    if len(word) != 5: return word # Only apply if word is 5 characters long
     transformed = [] # Initialize an empty list
     for i, char in enumerate(word): # Iterate through characters with their 0-based index
         if 'A' <= char <= 'Z': # Check if it's an uppercase letter
@@ -449,27 +495,25 @@ def position_index_product(word: str) -> str: # Pattern: multiplies each letter'
 
 def letter_index_double_mod_10(word: str) -> str: # Pattern: doubles each letter's index, takes modulo 10, maps to A-J (0-9)
     """Double each letter’s index, take mod 10, map to A=0, ..., J=9."""
-    if len(word) != 5: return word # Only apply if word is 5 characters long
     transformed = [] # Initialize an empty list
-    print(f"\n--- Debugging letter_index_double_mod_10 for '{word}' ---") # Debug print statement
+    debug = logger.isEnabledFor(logging.DEBUG) # Checked once, so the per-character logging costs nothing when disabled
+    if debug: logger.debug("Debugging letter_index_double_mod_10 for %r", word)
     for i, char in enumerate(word): # Iterate through characters with their 0-based index
         if 'A' <= char <= 'Z': # Check if it's an uppercase letter
             original_index = ord(char) - ASCII_A_UPPER # Get 0-25 index
             transformed_index = (original_index * 2) % 10 # Double index and apply modulo 10 (result will be 0-9)
             transformed_char = chr(ASCII_A_UPPER + transformed_index) # Convert new index (0-9) back to A-J
-            print(f"Char: {char} (OrigIdx: {original_index}) -> Doubled: {original_index*2} -> Mod 10: {transformed_index} -> Transformed Char: {transformed_char}") # Detailed debug print
+            if debug: logger.debug("Char: %s (OrigIdx: %d) -> Doubled: %d -> Mod 10: %d -> Transformed Char: %s", char, original_index, original_index * 2, transformed_index, transformed_char) # Detailed debug log
             transformed.append(transformed_char) # Append the transformed character
         else: # If not a letter, append unchanged
             transformed.append(char)
     result = "".join(transformed) # Join the list of characters
-    print(f"Final transformed word: {result}") # Debug print for final word
-    print("-------------------------------------------------------") # Debug separator
+    if debug: logger.debug("Final transformed word: %s", result) # Debug log for final word
     return result # Return the transformed word
 
 
 def consonant_index_triple_mod_26(word: str) -> str: # Pattern: triples consonants' indices, wraps around; vowels unchanged
     """Triple consonants’ indices, take mod 26; vowels unchanged."""
-    if len(word) != 5: return word # Only apply if word is 5 characters long
     transformed = [] # Initialize an empty list
     for char in word: # Iterate through each character
         if is_consonant(char): # If it's a consonant
@@ -0,0 +1,271 @@
+import argparse
+import array
+import bisect
+import concurrent.futures
+import hashlib
+import itertools
+import json
+import mmap
+import os
+import random
+import zlib
+from collections import Counter
+
+from pattern_compiler import MAX_WORD_LENGTH, MIN_WORD_LENGTH, WORD_LENGTH, compiled
+from pattern_registry import CANONICAL_PATTERNS
+
+
+# --- Offline Puzzle Bank ---
+# Built in two parallel passes so neither pass needs the whole bank in memory:
+#
+#   map    : the dictionary is streamed in fixed-size chunks; each worker applies
+#            every pattern to its chunk and splits the (word, pattern, transformed)
+#            rows into partitions by a hash of the transformed string
+#   reduce : each worker takes one partition, counts how often every transformed
+#            string occurs (all collisions land in the same partition), and writes
+#            the final shard with an ambiguity score per row
+#
+# Ambiguity is the number of *other* (word, pattern) pairs that produce the same
+# transformed string: 0 means the puzzle has exactly one answer.
+#
+# Every output file is written to a temporary name and renamed into place, and a
+# chunk or partition whose output already exists is skipped, so an interrupted build
+# resumes where it stopped. The app loads manifest.json and, per shard:
+#
+#   shard-NNN.tsv     : one row per puzzle (word, pattern, transformed, ambiguity),
+#                       grouped by pattern; written last, so it marks the shard as done
+#   shard-NNN.offsets : byte offset of every row (u32 array), so loading needs no parsing
+#   shard-NNN.json    : pattern name -> [first row, end row) within the shard
+PUZZLE_BANK_PATH = os.environ.get("PUZZLE_BANK_PATH") # Bank directory for the app to serve from (unset: no bank)
+DEFAULT_DICTIONARY = "/usr/share/dict/words"
+DEFAULT_CHUNK_SIZE = 2000 # Words per map task
+DEFAULT_PARTITIONS = 16 # Output shards
+MANIFEST_NAME = "manifest.json"
+CONFIG_NAME = "build_config.json"
+
+
+def stream_dictionary(path: str, min_length: int, max_length: int):
+    """Yield valid dictionary words (lowercase ASCII letters only, so no proper nouns), uppercased, once each."""
+    seen = set()
+    with open(path, encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            word = line.strip()
+            if min_length <= len(word) <= max_length and word.isascii() and word.isalpha() and word.islower():
+                word = word.upper()
+                if word not in seen:
+                    seen.add(word)
+                    yield word
+
+
+def _partition(transformed: str, partitions: int) -> int:
+    return zlib.crc32(transformed.encode()) % partitions # Stable across processes, unlike hash()
+
+
+def _write_atomic(path: str, text: str) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp" # Per process, so two builders on one directory never share a temp file
+    with open(tmp_path, "w", encoding="ascii") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def _map_path(work_dir: str, chunk_id: int, partition: int) -> str:
+    return os.path.join(work_dir, f"chunk-{chunk_id:06d}.part-{partition:03d}.tsv")
+
+
+def _done_path(work_dir: str, chunk_id: int) -> str:
+    return os.path.join(work_dir, f"chunk-{chunk_id:06d}.done")
+
+
+def shard_path(out_dir: str, partition: int, suffix: str = "tsv") -> str:
+    return os.path.join(out_dir, f"shard-{partition:03d}.{suffix}")
+
+
+def map_chunk(chunk_id: int, words: list, work_dir: str, partitions: int) -> int:
+    """Apply every canonical pattern to one chunk and write its rows, split by partition."""
+    rows = [[] for _ in range(partitions)]
+    for func in CANONICAL_PATTERNS:
+        transform, name = compiled(func), func.__name__
+        for word in words:
+            transformed = transform(word)
+            rows[_partition(transformed, partitions)].append(f"{word}\t{name}\t{transformed}\n")
+    for partition, lines in enumerate(rows):
+        _write_atomic(_map_path(work_dir, chunk_id, partition), "".join(lines))
+    _write_atomic(_done_path(work_dir, chunk_id), "") # Marker: every partition file of this chunk is complete
+    return len(words)
+
+
+def reduce_partition(partition: int, chunk_count: int, work_dir: str, out_dir: str) -> int:
+    """Score every row in one partition by ambiguity and write it as a shard."""
+    rows = []
+    for chunk_id in range(chunk_count):
+        with open(_map_path(work_dir, chunk_id, partition), encoding="ascii") as f:
+            rows.extend(line.rstrip("\n").split("\t") for line in f)
+    counts = Counter(transformed for _, _, transformed in rows)
+    rows.sort(key=lambda row: (row[1], row[2], row[0])) # Grouped by pattern; deterministic however chunks were scheduled
+    lines = [f"{word}\t{name}\t{transformed}\t{counts[transformed] - 1}\n" for word, name, transformed in rows]
+    offsets = array.array("I", itertools.accumulate((len(line) for line in lines), initial=0))[:-1]
+    ranges = {}
+    for row, (_, name, _) in enumerate(rows):
+        ranges.setdefault(name, [row, row])[1] = row + 1
+    tmp_path = f"{shard_path(out_dir, partition, 'offsets')}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        offsets.tofile(f)
+    os.replace(tmp_path, shard_path(out_dir, partition, "offsets"))
+    _write_atomic(shard_path(out_dir, partition, "json"), json.dumps(ranges))
+    _write_atomic(shard_path(out_dir, partition), "".join(lines))
+    return len(rows)
+
+
+def build_bank(dictionary: str, out_dir: str, min_length: int = WORD_LENGTH, max_length: int = WORD_LENGTH,
+               workers: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE, partitions: int = DEFAULT_PARTITIONS,
+               restart: bool = False) -> dict:
+    """Build (or resume building) a sharded puzzle bank from a dictionary file; returns the manifest."""
+    if not MIN_WORD_LENGTH <= min_length <= max_length <= MAX_WORD_LENGTH:
+        raise ValueError(f"Word lengths must be within {MIN_WORD_LENGTH}-{MAX_WORD_LENGTH}.")
+    work_dir = os.path.join(out_dir, "work")
+    os.makedirs(work_dir, exist_ok=True)
+
+    stat = os.stat(dictionary)
+    config = {
+        "dictionary": os.path.abspath(dictionary), "dictionary_size": stat.st_size, "dictionary_mtime": stat.st_mtime,
+        "min_length": min_length, "max_length": max_length, "chunk_size": chunk_size, "partitions": partitions,
+        "patterns": [func.__name__ for func in CANONICAL_PATTERNS],
+    }
+    config_path = os.path.join(out_dir, CONFIG_NAME)
+    if os.path.exists(config_path) and not restart:
+        with open(config_path, encoding="utf-8") as f:
+            if json.load(f) != config:
+                raise ValueError(f"{out_dir} holds a build with different settings; pass --restart to rebuild it.")
+    else:
+        for name in os.listdir(work_dir):
+            os.remove(os.path.join(work_dir, name))
+        for partition in range(partitions):
+            if os.path.exists(shard_path(out_dir, partition)):
+                os.remove(shard_path(out_dir, partition))
+        _write_atomic(config_path, json.dumps(config, indent=2))
+
+    workers = workers or os.cpu_count() or 1
+    todo = [p for p in range(partitions) if not os.path.exists(shard_path(out_dir, p))] # Shards still to reduce
+    words = stream_dictionary(dictionary, min_length, max_length)
+    word_count = 0
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        # Map: keep at most 2 chunks per worker in flight, so the dictionary is streamed rather than loaded
+        pending = set()
+        chunk_count = 0
+        for chunk_id in itertools.count():
+            chunk = list(itertools.islice(words, chunk_size))
+            if not chunk:
+                break
+            chunk_count += 1
+            word_count += len(chunk)
+            if not todo or os.path.exists(_done_path(work_dir, chunk_id)):
+                continue # Finished by an earlier, interrupted run
+            pending.add(pool.submit(map_chunk, chunk_id, chunk, work_dir, partitions))
+            if len(pending) >= 2 * workers:
+                done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+        for future in concurrent.futures.as_completed(pending):
+            future.result()
+
+        # Reduce: one task per missing shard
+        for future in concurrent.futures.as_completed(
+                [pool.submit(reduce_partition, p, chunk_count, work_dir, out_dir) for p in todo]):
+            future.result()
+
+    shards = []
+    for partition in range(partitions):
+        path = shard_path(out_dir, partition)
+        with open(path, "rb") as f:
+            data = f.read()
+        with open(shard_path(out_dir, partition, "json"), encoding="utf-8") as f:
+            ranges = json.load(f)
+        shards.append({"file": os.path.basename(path), "offsets": os.path.basename(shard_path(out_dir, partition, "offsets")),
+                       "puzzles": data.count(b"\n"), "sha256": hashlib.sha256(data).hexdigest(), "patterns": ranges})
+    manifest = {
+        "words": word_count, "puzzles": sum(shard["puzzles"] for shard in shards),
+        "patterns": config["patterns"], "min_length": min_length, "max_length": max_length, "shards": shards,
+    }
+    _write_atomic(os.path.join(out_dir, MANIFEST_NAME), json.dumps(manifest, indent=2))
+    for name in os.listdir(work_dir): # Intermediate rows are no longer needed once every shard exists
+        os.remove(os.path.join(work_dir, name))
+    os.rmdir(work_dir) # Recreated empty by a rerun; the shards are reused as they are
+    return manifest
+
+
+def _map_file(path: str):
+    """A shared, read-only mapping of a file (empty bytes for an empty file, which cannot be mapped)."""
+    with open(path, "rb") as f:
+        if not os.fstat(f.fileno()).st_size:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class PuzzleBank:
+    """A built puzzle bank: memory-mapped shards plus row offsets, sampled uniformly per pattern."""
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, MANIFEST_NAME), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self._data = [] # Per shard: TSV rows, mapped read-only so gunicorn workers share the pages (as PuzzleIndex does)
+        self._offsets = [] # Per shard: row start offsets (u32), a view over the mapped offsets file
+        self._segments = {} # Pattern name -> [(shard, first row, end row)]
+        for shard_id, shard in enumerate(self.manifest["shards"]):
+            self._data.append(_map_file(os.path.join(path, shard["file"])))
+            self._offsets.append(memoryview(_map_file(os.path.join(path, shard["offsets"]))).cast("I"))
+            for name, (first, end) in shard["patterns"].items():
+                self._segments.setdefault(name, []).append((shard_id, first, end))
+        self._cumulative = { # Pattern name -> running row totals over its segments, for bisect
+            name: list(itertools.accumulate(end - first for _, first, end in segments))
+            for name, segments in self._segments.items()
+        }
+        self.pattern_names = frozenset(self._segments)
+
+    def random_puzzle(self, pattern_name: str) -> tuple:
+        """A random (original, transformed, ambiguity) row for one pattern."""
+        cumulative = self._cumulative[pattern_name]
+        pick = random.randrange(cumulative[-1])
+        segment = bisect.bisect_right(cumulative, pick)
+        shard_id, first, _ = self._segments[pattern_name][segment]
+        row = first + pick - (cumulative[segment - 1] if segment else 0)
+        data, start = self._data[shard_id], self._offsets[shard_id][row]
+        word, _, transformed, ambiguity = data[start:data.find(b"\n", start)].decode("ascii").split("\t")
+        return word, transformed, int(ambiguity)
+
+    def words(self) -> list:
+        """Every original word in the bank (each one has a row for every pattern, so one pattern's rows suffice)."""
+        name = min(self.pattern_names)
+        words = []
+        for shard_id, first, end in self._segments[name]:
+            data, offsets = self._data[shard_id], self._offsets[shard_id]
+            words.extend(data[offsets[row]:data.find(b"\t", offsets[row])].decode("ascii") for row in range(first, end))
+        return sorted(words)
+
+    def __len__(self):
+        return self.manifest["puzzles"]
+
+
+def open_bank(path: str = PUZZLE_BANK_PATH):
+    """Load the puzzle bank if one has been built (returns None otherwise)."""
+    if not path or not os.path.exists(os.path.join(path, MANIFEST_NAME)):
+        return None
+    return PuzzleBank(path)
+
+
+# --- Build Step ---
+if __name__ == "__main__": # python puzzle_bank.py --out puzzle_bank [--dict /usr/share/dict/words] [--workers 8]
+    parser = argparse.ArgumentParser(description="Build a sharded, resumable puzzle bank with ambiguity scores.")
+    parser.add_argument("--dict", default=DEFAULT_DICTIONARY, help="Dictionary file, one word per line")
+    parser.add_argument("--out", default=PUZZLE_BANK_PATH or "puzzle_bank", help="Output directory")
+    parser.add_argument("--min-length", type=int, default=WORD_LENGTH, help="Shortest word to keep")
+    parser.add_argument("--max-length", type=int, default=WORD_LENGTH, help="Longest word to keep")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Words per map task")
+    parser.add_argument("--partitions", type=int, default=DEFAULT_PARTITIONS, help="Number of output shards")
+    parser.add_argument("--restart", action="store_true", help="Discard a previous (partial) build in --out")
+    args = parser.parse_args()
+
+    result = build_bank(args.dict, args.out, args.min_length, args.max_length, args.workers,
+                        args.chunk_size, args.partitions, args.restart)
+    print(f"Wrote {result['puzzles']} puzzles from {result['words']} words "
+          f"in {len(result['shards'])} shards to {args.out}")
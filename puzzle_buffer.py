@@ -0,0 +1,83 @@
+import collections
+import os
+import threading
+import weakref
+
+from app_logging import get_logger
+from metrics import Counter, Gauge, Histogram
+
+
+# --- Pre-generated Puzzle Buffer ---
+# A background producer keeps a bounded FIFO of ready-to-send puzzles, already
+# serialized to bytes, for every pattern, so a request only has to pop one for the
+# pattern the scheduler picked. deque.append/popleft are atomic, so consumers never
+# take a lock.
+PUZZLE_BUFFER_SIZE = int(os.environ.get("PUZZLE_BUFFER_SIZE", 256)) # Puzzles kept ready in total (0 disables the buffer)
+PUZZLE_BUFFER_LOW_WATER = 0.5 # Wake the producer once a pattern's depth drops below this fraction of its share
+
+logger = get_logger("puzzle_buffer")
+BUFFER_HITS = Counter("puzzle_buffer_hits_total", "Puzzles served from the pre-generated buffer")
+BUFFER_MISSES = Counter("puzzle_buffer_misses_total", "Puzzles generated inline instead of from the buffer", ["reason"])
+BUFFER_STAGE_SECONDS = Histogram("puzzle_buffer_stage_seconds", "Time the background producer spends in each stage of building a puzzle",
+                                 ["stage"]) # Kept out of puzzle_stage_seconds, which times requests
+_buffers = weakref.WeakSet() # Live buffers, summed by the one depth gauge
+Gauge("puzzle_buffer_depth", "Puzzles currently waiting in the buffer", lambda: sum(len(b) for b in list(_buffers)))
+
+
+class PuzzleBuffer:
+    """Bounded per-pattern FIFOs of serialized puzzles, refilled by a producer thread."""
+
+    def __init__(self, produce, pattern_names, capacity: int = PUZZLE_BUFFER_SIZE):
+        self._produce = produce # Callable(pattern_name) returning body_bytes for one new puzzle
+        self.capacity = capacity
+        self._entries = {name: collections.deque() for name in pattern_names} # Pattern name -> serialized puzzles
+        self._per_pattern = max(1, capacity // max(1, len(self._entries))) # Each pattern's share of the capacity
+        self._low_water = max(1, int(self._per_pattern * PUZZLE_BUFFER_LOW_WATER))
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None # Producer threads do not survive a fork; restart per worker
+        self._start_lock = threading.Lock()
+        _buffers.add(self)
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            for entries in self._entries.values():
+                entries.clear() # Entries copied from a parent process would be served twice
+            self._thread = threading.Thread(target=self._run, name="puzzle-buffer-producer", daemon=True)
+            self._thread.start()
+
+    def pop(self, pattern_name: str):
+        """Take a ready puzzle for this pattern, or return None (a miss)."""
+        if self._pid != os.getpid():
+            self.start()
+        entries = self._entries.get(pattern_name)
+        if entries is None:
+            BUFFER_MISSES.inc("unknown_pattern")
+            return None
+        try:
+            body = entries.popleft()
+        except IndexError:
+            BUFFER_MISSES.inc("empty")
+            self._wakeup.set()
+            return None
+        if len(entries) < self._low_water:
+            self._wakeup.set()
+        BUFFER_HITS.inc()
+        return body
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._entries.values())
+
+    def _run(self) -> None:
+        while True:
+            try:
+                for name, entries in self._entries.items():
+                    while len(entries) < self._per_pattern:
+                        entries.append(self._produce(name))
+            except Exception:
+                logger.exception("Puzzle buffer producer failed") # Back off until the next wakeup instead of spinning
+            self._wakeup.wait(timeout=1.0)
+            self._wakeup.clear()
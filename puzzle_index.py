@@ -0,0 +1,128 @@
+import argparse
+import mmap
+import os
+import random
+import struct
+
+from pattern_compiler import WORD_LENGTH
+from pattern_registry import CANONICAL_PATTERNS
+from word_pool import FALLBACK_WORDS, fetch_words, filter_words
+
+
+# --- Puzzle Index File Format ---
+# Every (word, pattern) result is deterministic once the word set is fixed, so the
+# build step writes all of them to one binary file that app.py memory-maps:
+#
+#   header   : MAGIC, version (u8), word count N (u32), pattern count P (u16)
+#   names    : P pattern names, each a u8 length followed by ASCII bytes
+#   words    : N fixed-width 5-byte records (the original words)
+#   results  : P * N fixed-width 5-byte records, pattern-major, so the
+#              result of pattern id p on word w is record p * N + w
+#
+# The file is opened read-only and mapped shared, so every gunicorn worker reads
+# the same page-cache pages instead of holding its own copy. A rebuilt index is
+# picked up when the workers restart (e.g. `kill -HUP` the gunicorn master).
+MAGIC = b"PZIX"
+VERSION = 1
+HEADER = struct.Struct("<4sBIH") # magic, version, word count, pattern count
+RECORD_SIZE = WORD_LENGTH # One 5-letter word per record
+DEFAULT_INDEX_PATH = os.environ.get("PUZZLE_INDEX_PATH", "puzzles.idx")
+
+
+def load_word_list(path: str) -> list:
+    """Read a local word list (one word per line) and keep the valid 5-letter words."""
+    with open(path, encoding="utf-8") as f:
+        return filter_words(line.strip() for line in f)
+
+
+def build_index(words, out_path: str, pattern_funcs=CANONICAL_PATTERNS) -> None:
+    """Apply every pattern to every word and write the results as a puzzle index."""
+    from batch_patterns import apply_all, encode_words # NumPy is only needed for the offline build
+
+    words = filter_words(words)
+    if not words:
+        raise ValueError("Cannot build a puzzle index from an empty word list.")
+    encoded = encode_words(words)
+    results = apply_all(encoded, pattern_funcs)
+
+    tmp_path = f"{out_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(words), len(pattern_funcs)))
+        for func in pattern_funcs:
+            name = func.__name__.encode("ascii")
+            f.write(struct.pack("<B", len(name)) + name)
+        f.write(encoded.tobytes())
+        f.write(results.tobytes())
+    os.replace(tmp_path, out_path) # Atomic swap: running workers keep their mapping of the old file until restarted
+
+
+class PuzzleIndex:
+    """Read-only, memory-mapped view of a puzzle index built by build_index()."""
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) # Shared, read-only mapping
+        magic, version, self.word_count, pattern_count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} puzzle index.")
+        offset = HEADER.size
+        self.pattern_names = []
+        for _ in range(pattern_count):
+            length = self._map[offset]
+            self.pattern_names.append(self._map[offset + 1:offset + 1 + length].decode("ascii"))
+            offset += 1 + length
+        self.pattern_ids = {name: i for i, name in enumerate(self.pattern_names)} # Pattern name -> id
+        self._words_offset = offset
+        self._results_offset = offset + self.word_count * RECORD_SIZE
+        expected = self._results_offset + pattern_count * self.word_count * RECORD_SIZE
+        if len(self._map) != expected:
+            raise ValueError(f"{path} is truncated or corrupt ({len(self._map)} bytes, expected {expected}).")
+
+    def _record(self, offset: int) -> str:
+        return self._map[offset:offset + RECORD_SIZE].decode("ascii")
+
+    def word(self, word_id: int) -> str:
+        return self._record(self._words_offset + word_id * RECORD_SIZE)
+
+    def result(self, pattern_id: int, word_id: int) -> str:
+        return self._record(self._results_offset + (pattern_id * self.word_count + word_id) * RECORD_SIZE)
+
+    def words(self) -> list:
+        """All original words in the index, in word-id order."""
+        data = self._map[self._words_offset:self._results_offset].decode("ascii")
+        return [data[i:i + RECORD_SIZE] for i in range(0, len(data), RECORD_SIZE)]
+
+    def random_puzzle(self, pattern_name: str) -> tuple:
+        """Return a random (original_word, transformed_word) pair for the named pattern."""
+        pattern_id = self.pattern_ids[pattern_name]
+        word_id = random.randrange(self.word_count)
+        return self.word(word_id), self.result(pattern_id, word_id)
+
+    def close(self) -> None:
+        self._map.close()
+
+
+def open_index(path: str = DEFAULT_INDEX_PATH):
+    """Open the puzzle index if it exists, otherwise return None."""
+    if not os.path.exists(path):
+        return None
+    return PuzzleIndex(path)
+
+
+# --- Build Step ---
+if __name__ == "__main__": # python puzzle_index.py [--words words.txt] [--out puzzles.idx]
+    parser = argparse.ArgumentParser(description="Precompute every (word, pattern) result into a memory-mappable index.")
+    parser.add_argument("--words", help="Local word list, one word per line (default: fetch from Datamuse)")
+    parser.add_argument("--out", default=DEFAULT_INDEX_PATH, help="Index file to write")
+    args = parser.parse_args()
+
+    if args.words:
+        word_list = load_word_list(args.words)
+    else:
+        try:
+            word_list = fetch_words()
+        except Exception as e:
+            print(f"Could not fetch words from Datamuse ({e}), using fallback words")
+            word_list = FALLBACK_WORDS
+    build_index(word_list, args.out)
+    print(f"Wrote {len(word_list)} words x {len(CANONICAL_PATTERNS)} patterns to {args.out}")
@@ -0,0 +1,134 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+
+from pattern_compiler import compiled
+from pattern_registry import CANONICAL_PATTERNS
+from puzzle_index import load_word_list
+
+
+# --- Static Puzzle Packs ---
+# A pack is every (word, pattern) puzzle over a local word list, written as one
+# compressed JSON document for the frontend to download once and play offline:
+#
+#   {"format": 1, "patterns": [name, ...],
+#    "puzzles": [[original, transformed, pattern index], ...], "count": N}
+#
+# Rows are generated, encoded and compressed one word at a time straight into the
+# output file, so memory stays flat however many puzzles the pack holds. The file
+# is named after a hash of its compressed bytes (puzzles-<hash>.json.gz), which makes
+# it immutable: it can be cached for a year, and a new pack gets a new URL.
+# latest.json in the same directory points at the newest pack.
+PUZZLE_PACK_DIR = os.environ.get("PUZZLE_PACK_DIR", "puzzle_packs") # Directory packs are written to and served from
+PACK_FORMAT = 1 # Bumped if the JSON layout changes
+LATEST_NAME = "latest.json"
+ENCODINGS = {"gzip": ".json.gz", "br": ".json.br"} # Content-Encoding -> file suffix
+PACK_NAME = re.compile(r"^puzzles-[0-9a-f]{16}\.json\.(gz|br)$")
+COMPRESSION_LEVEL = {"gzip": 9, "br": 9} # Brotli's 10-11 are far slower for little gain on packs this size
+
+
+class _HashingWriter:
+    """File wrapper that hashes everything written through it."""
+
+    def __init__(self, f):
+        self._f = f
+        self.hash = hashlib.blake2b(digest_size=8)
+
+    def write(self, data) -> int:
+        self.hash.update(data)
+        return self._f.write(data)
+
+    def flush(self) -> None:
+        self._f.flush()
+
+
+class _BrotliWriter:
+    """Minimal write/close stream over a brotli compressor."""
+
+    def __init__(self, fileobj, level: int):
+        import brotli # Optional: only needed for --encoding br (pip install brotli)
+        self._f = fileobj
+        self._compressor = brotli.Compressor(quality=level)
+
+    def write(self, data: bytes) -> None:
+        self._f.write(self._compressor.process(data))
+
+    def close(self) -> None:
+        self._f.write(self._compressor.finish())
+
+
+def _compressor(encoding: str, fileobj):
+    if encoding == "gzip":
+        return gzip.GzipFile(filename="", mode="wb", fileobj=fileobj, compresslevel=COMPRESSION_LEVEL["gzip"],
+                             mtime=0) # No name or timestamp in the header: same puzzles, same bytes, same hash
+    return _BrotliWriter(fileobj, COMPRESSION_LEVEL["br"])
+
+
+def build_pack(words, out_dir: str = PUZZLE_PACK_DIR, encoding: str = "gzip", pattern_funcs=CANONICAL_PATTERNS) -> dict:
+    """Stream every (word, pattern) puzzle into a compressed, content-addressed pack; returns its latest.json entry."""
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown encoding {encoding!r} (expected one of {', '.join(ENCODINGS)})")
+    names = [func.__name__ for func in pattern_funcs]
+    transforms = [compiled(func) for func in pattern_funcs]
+    os.makedirs(out_dir, exist_ok=True)
+    tmp_path = os.path.join(out_dir, f"pack-{os.getpid()}.tmp")
+    count = word_count = 0
+    with open(tmp_path, "wb") as f:
+        writer = _HashingWriter(f)
+        stream = _compressor(encoding, writer)
+        stream.write(json.dumps({"format": PACK_FORMAT, "patterns": names}, separators=(",", ":"))[:-1].encode())
+        stream.write(b',"puzzles":[')
+        for word in words:
+            rows = [[word, transform(word), i] for i, transform in enumerate(transforms)]
+            # One json.dumps per word (not per row), minus its brackets, keeps encoding cheap
+            stream.write((b"," if count else b"") + json.dumps(rows, separators=(",", ":"))[1:-1].encode())
+            count += len(rows)
+            word_count += 1
+        stream.write(f'],"count":{count}}}'.encode())
+        stream.close()
+    if not word_count:
+        os.remove(tmp_path)
+        raise ValueError("Cannot build a puzzle pack from an empty word list.")
+    digest = writer.hash.hexdigest()
+    file_name = f"puzzles-{digest}{ENCODINGS[encoding]}"
+    os.replace(tmp_path, os.path.join(out_dir, file_name))
+    latest = {"file": file_name, "hash": digest, "encoding": encoding, "format": PACK_FORMAT,
+              "puzzles": count, "words": word_count, "patterns": len(names)}
+    tmp_latest = os.path.join(out_dir, f"{LATEST_NAME}.{os.getpid()}.tmp")
+    with open(tmp_latest, "w", encoding="utf-8") as f:
+        json.dump(latest, f)
+    os.replace(tmp_latest, os.path.join(out_dir, LATEST_NAME)) # Switched only once the pack itself is in place
+    return latest
+
+
+def latest_pack(out_dir: str = PUZZLE_PACK_DIR):
+    """The newest pack's latest.json entry, or None if no pack has been built."""
+    try:
+        with open(os.path.join(out_dir, LATEST_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def pack_encoding(file_name: str):
+    """Content-Encoding of a pack file name, or None if the name is not a pack."""
+    match = PACK_NAME.match(file_name)
+    if not match:
+        return None
+    return "gzip" if match.group(1) == "gz" else "br"
+
+
+# --- Build Step ---
+if __name__ == "__main__": # python puzzle_pack.py --words words.txt [--out puzzle_packs] [--encoding br]
+    parser = argparse.ArgumentParser(description="Write every (word, pattern) puzzle to a compressed, content-hashed pack.")
+    parser.add_argument("--words", required=True, help="Local word list, one word per line")
+    parser.add_argument("--out", default=PUZZLE_PACK_DIR, help="Directory to write the pack and latest.json to")
+    parser.add_argument("--encoding", choices=list(ENCODINGS), default="gzip", help="Compression (br needs the brotli package)")
+    args = parser.parse_args()
+
+    result = build_pack(load_word_list(args.words), args.out, args.encoding)
+    print(f"Wrote {result['puzzles']} puzzles ({result['words']} words x {result['patterns']} patterns) "
+          f"to {os.path.join(args.out, result['file'])}")
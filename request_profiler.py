@@ -0,0 +1,174 @@
+import cProfile
+import functools
+import marshal
+import os
+import pstats
+import random
+import threading
+import time
+import weakref
+from collections import Counter as StackCounter
+
+from app_logging import get_logger
+from metrics import Counter, Gauge
+
+
+# --- On-demand Request Profiler ---
+# Off by default. When a sample rate is set (PROFILE_SAMPLE_RATE, or the admin
+# endpoint at runtime) that fraction of requests runs under cProfile. Results are
+# aggregated over rolling windows of PROFILE_WINDOW seconds; a download covers the last
+# completed window plus the current one, as pstats (for snakeviz / pstats.Stats) or as
+# collapsed stacks ("frame;frame;frame count" lines, for flamegraph.pl / speedscope).
+# The stacks are rebuilt from cProfile's caller/callee times, not sampled, so even
+# sub-millisecond requests show up; each stack's count is its self time in microseconds.
+# While disabled, a request pays for one attribute check.
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0)) # Fraction of requests profiled (0 disables profiling)
+PROFILE_WINDOW = float(os.environ.get("PROFILE_WINDOW", 60)) # Seconds of profiles aggregated per window
+PROFILE_ADMIN_TOKEN = os.environ.get("PROFILE_ADMIN_TOKEN", "") # X-Admin-Token for the admin endpoints ("" disables them)
+
+logger = get_logger("profiler")
+PROFILED_REQUESTS = Counter("profiled_requests_total", "Requests run under the profiler")
+_profilers = weakref.WeakSet() # Live profilers, read by the one sample-rate gauge
+Gauge("profile_sample_rate", "Fraction of requests being profiled",
+      lambda: max((profiler.rate for profiler in list(_profilers)), default=0.0))
+MAX_STACK_DEPTH = 64 # Collapsed stacks are cut off below this many frames
+MIN_STACK_MICROSECONDS = 1 # Call paths accounting for less time than this are dropped
+
+
+def frame_label(func) -> str:
+    """One collapsed-stack frame for a pstats key: function (file:line), with no ";" (the frame separator)."""
+    file_name, line, name = func
+    label = name if file_name == "~" else f"{name} ({os.path.basename(file_name)}:{line})" # "~": a built-in
+    return label.replace(";", ":")
+
+
+def collapse_stats(stats: dict) -> StackCounter:
+    """Collapsed stack -> self time in microseconds, rebuilt from pstats data.
+
+    A function's time is split between its callers in proportion to the cumulative time
+    each call edge accounts for, walking down from the functions nothing else called.
+    """
+    callees = {} # Function -> [(callee, cumulative seconds via this edge)]
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+    stacks = StackCounter()
+
+    def visit(func, path, seconds):
+        cumulative, own = stats[func][3], stats[func][2]
+        share = min(1.0, seconds / cumulative) if cumulative else 1.0
+        path = path + (frame_label(func),)
+        self_us = round(own * share * 1e6)
+        if self_us >= MIN_STACK_MICROSECONDS:
+            stacks[";".join(path)] += self_us
+        if len(path) >= MAX_STACK_DEPTH:
+            return
+        for callee, edge_seconds in callees.get(func, ()):
+            if edge_seconds * share * 1e6 >= MIN_STACK_MICROSECONDS and frame_label(callee) not in path: # Recursion is cut at its first repeat
+                visit(callee, path, edge_seconds * share)
+
+    for func, (_, _, _, cumulative, callers) in stats.items():
+        if not callers:
+            visit(func, (), cumulative)
+    return stacks
+
+
+class _Window:
+    """Profiles aggregated since `started`."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.requests = 0
+        self.stats = None # pstats.Stats, created by the first profile
+
+
+class RequestProfiler:
+    """Profiles a random fraction of requests and aggregates them over rolling time windows."""
+
+    def __init__(self, rate: float = PROFILE_SAMPLE_RATE, window: float = PROFILE_WINDOW):
+        self.rate = rate
+        self.window = window
+        self._current, self._previous = _Window(), None
+        self._lock = threading.Lock() # Guards the windows
+        _profilers.add(self)
+
+    def set_rate(self, rate: float) -> None:
+        """Enable (rate > 0), retune or disable (0) profiling at runtime; disabling also discards collected data."""
+        self.rate = min(1.0, max(0.0, rate))
+        if not self.rate:
+            with self._lock:
+                self._current, self._previous = _Window(), None
+        logger.warning("Request profiling %s", f"enabled for {self.rate:.1%} of requests" if self.rate else "disabled")
+
+    def profiled(self, view):
+        """Decorator: run the view under the profiler for a `rate` fraction of calls."""
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            rate = self.rate
+            if not rate or random.random() >= rate:
+                return view(*args, **kwargs)
+            return self._run(view, args, kwargs)
+        return wrapper
+
+    def _run(self, view, args, kwargs):
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError: # Another profiler already holds the interpreter's hook: serve this request unprofiled
+            return view(*args, **kwargs)
+        try:
+            return view(*args, **kwargs)
+        finally:
+            profile.disable()
+            PROFILED_REQUESTS.inc()
+            with self._lock:
+                window = self._window()
+                window.requests += 1
+                if window.stats is None:
+                    window.stats = pstats.Stats(profile)
+                else:
+                    window.stats.add(profile)
+
+    def _window(self) -> _Window:
+        """The current window, rolling it over if it has run its length (call with the lock held)."""
+        age = time.time() - self._current.started
+        if age >= self.window:
+            # The finished window is kept for downloads, unless nothing was profiled for a whole window since
+            self._current, self._previous = _Window(), self._current if age < 2 * self.window else None
+        return self._current
+
+    # --- Downloads ---
+    def _windows(self) -> list:
+        with self._lock:
+            self._window()
+            return [w for w in (self._previous, self._current) if w is not None]
+
+    def status(self) -> dict:
+        windows = self._windows()
+        return {
+            "sample_rate": self.rate,
+            "window_seconds": self.window,
+            "since": min(w.started for w in windows),
+            "profiled_requests": sum(w.requests for w in windows),
+        }
+
+    def _merged(self):
+        """The windows' cProfile stats merged into a fresh pstats.Stats, or None if nothing was profiled."""
+        merged = pstats.Stats() # A fresh object: the windows keep aggregating into their own
+        with self._lock:
+            windows = [w for w in (self._previous, self._current) if w is not None and w.stats is not None]
+            for w in windows:
+                merged.add(w.stats)
+        return merged if windows else None
+
+    def pstats_dump(self):
+        """Aggregated cProfile stats in the marshal format pstats.Stats() loads, or None if nothing was profiled."""
+        merged = self._merged()
+        return marshal.dumps(merged.stats) if merged is not None else None
+
+    def collapsed(self):
+        """Aggregated stacks, one "frame;frame microseconds" line per distinct stack, or None if nothing was profiled."""
+        merged = self._merged()
+        if merged is None:
+            return None
+        return "".join(f"{stack} {count}\n" for stack, count in collapse_stats(merged.stats).most_common())
@@ -0,0 +1,71 @@
+import datetime
+import hashlib
+import os
+
+from pattern_compiler import compiled
+from pattern_registry import CANONICAL_PATTERNS
+from puzzle_index import load_word_list
+
+
+# --- Deterministic (Seeded) Puzzles ---
+# A puzzle key ("id:42", "daily:2026-01-31", ...) is hashed together with a digest of
+# the word list, and the hash output picks the word and the pattern. The same key
+# therefore always yields the same puzzle for a given word list. The URL does not name
+# the word list, so responses are cached for SEEDED_MAX_AGE and then revalidated with
+# an ETag (known before any work is done) that changes whenever the word list does.
+PUZZLE_WORDS_PATH = os.environ.get("PUZZLE_WORDS_PATH") # Local word list for seeded puzzles (else the index's words)
+SEEDED_MAX_AGE = int(os.environ.get("SEEDED_MAX_AGE", 3600)) # Seconds caches may serve a seeded puzzle before revalidating
+
+
+class SeededPuzzles:
+    """Maps puzzle keys to fixed (word, pattern) pairs over a fixed word list."""
+
+    def __init__(self, words, pattern_funcs=CANONICAL_PATTERNS):
+        self.words = sorted(set(words)) # Sorted so the mapping does not depend on the source's order
+        if not self.words:
+            raise ValueError("Seeded puzzles need a non-empty word list.")
+        self.pattern_funcs = list(pattern_funcs)
+        fingerprint = hashlib.blake2b(digest_size=16)
+        fingerprint.update("\n".join(self.words).encode())
+        fingerprint.update("\n".join(f.__name__ for f in self.pattern_funcs).encode())
+        self.version = fingerprint.hexdigest() # Changes whenever the word list or pattern list changes
+
+    def _counter(self, key: str) -> bytes:
+        return hashlib.blake2b(f"{self.version}:{key}".encode(), digest_size=16).digest()
+
+    def etag(self, key: str) -> str:
+        """Strong ETag for a puzzle key, computed without generating the puzzle."""
+        return self._counter(key)[:12].hex()
+
+    def puzzle(self, key: str) -> dict:
+        """The fixed puzzle for this key."""
+        digest = self._counter(key)
+        word = self.words[int.from_bytes(digest[:8], "big") % len(self.words)]
+        pattern_func = self.pattern_funcs[int.from_bytes(digest[8:], "big") % len(self.pattern_funcs)]
+        return {
+            "original_word": word,
+            "transformed_word": compiled(pattern_func)(word),
+            "pattern_applied": pattern_func.__name__
+        }
+
+
+def puzzle_key(puzzle_id: str) -> str:
+    return f"id:{puzzle_id}"
+
+
+def daily_key(day: datetime.date) -> str:
+    return f"daily:{day.isoformat()}"
+
+
+def seconds_until_next_utc_day(now: datetime.datetime = None) -> int:
+    """Cache lifetime for today's daily puzzle."""
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    tomorrow = (now + datetime.timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return max(1, int((tomorrow - now).total_seconds()))
+
+
+def load_seed_words(local_words=None):
+    """Word list for seeded puzzles: PUZZLE_WORDS_PATH if set, else the given local words (None if neither)."""
+    if PUZZLE_WORDS_PATH:
+        return load_word_list(PUZZLE_WORDS_PATH)
+    return list(local_words) if local_words else None
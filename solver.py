@@ -0,0 +1,42 @@
+from collections import defaultdict
+
+from pattern_compiler import compiled
+from pattern_registry import CANONICAL_PATTERNS
+
+
+# --- Inverse Lookup Tables ---
+# For every pattern, map each transformed word back to the original words that
+# produce it. Many patterns are not invertible (letter_index_double_mod_10,
+# double_index_mod_26, character_order_reverse, ...), so each entry holds a tuple
+# of originals rather than a single word.
+
+
+class Solver:
+    """Precomputed transformed -> originals tables for every pattern over a fixed word set."""
+
+    def __init__(self, words, pattern_funcs=CANONICAL_PATTERNS):
+        self.words = words # Kept so callers can tell which word set the tables were built from
+        self.word_set = frozenset(words)
+        self.pattern_funcs = list(pattern_funcs)
+        self.inverse = {} # Pattern name -> {transformed word -> tuple of original words}
+        for func in self.pattern_funcs:
+            transform = compiled(func)
+            table = defaultdict(list)
+            for word in self.word_set:
+                table[transform(word)].append(word)
+            self.inverse[func.__name__] = {t: tuple(sorted(originals)) for t, originals in table.items()}
+        self._forward = {func.__name__: compiled(func) for func in self.pattern_funcs} # For guesses outside the word set
+
+    def solve(self, transformed: str) -> list:
+        """Every (original word, pattern name) pair in the word set that produces `transformed`."""
+        return [(original, name)
+                for name, table in self.inverse.items()
+                for original in table.get(transformed, ())]
+
+    def matching_patterns(self, transformed: str, guess: str, pattern_names=None) -> list:
+        """Names of the patterns (optionally restricted to pattern_names) that turn `guess` into `transformed`."""
+        names = pattern_names if pattern_names is not None else self.inverse.keys()
+        if guess in self.word_set:
+            return [name for name in names if guess in self.inverse[name].get(transformed, ())]
+        # Not a word we built tables for (e.g. the pool refreshed since the puzzle was served): apply forward
+        return [name for name in names if self._forward[name](guess) == transformed]
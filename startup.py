@@ -0,0 +1,30 @@
+import time
+
+from app_logging import get_logger
+from metrics import Gauge
+
+
+# --- Startup Instrumentation ---
+# Imported first by app.py, so STARTED approximates the moment the app began
+# importing. Each phase is recorded once, as seconds since STARTED:
+#   app_loaded      - app.py finished importing (routes registered, pool started)
+#   word_pool_ready - the word pool has real words (from the snapshot or Datamuse)
+#   first_puzzle    - the first /get_patterned_word response was built
+STARTED = time.perf_counter()
+
+logger = get_logger("startup")
+_phases = {} # Phase name -> seconds since STARTED
+Gauge("startup_phase_seconds", "Seconds from app import to each startup phase",
+      lambda: {(name,): seconds for name, seconds in _phases.items()}, ["phase"])
+
+
+def mark(phase: str) -> None:
+    """Record the first time a startup phase is reached (later calls are a cheap no-op)."""
+    if phase in _phases:
+        return
+    _phases[phase] = seconds = time.perf_counter() - STARTED
+    logger.info("Startup phase reached", extra={"phase": phase, "seconds": round(seconds, 6)})
+
+
+def phases() -> dict:
+    return dict(_phases)
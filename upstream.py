@@ -0,0 +1,128 @@
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import Counter
+
+
+# --- Upstream Client Configuration ---
+UPSTREAM_CONNECT_TIMEOUT = float(os.environ.get("UPSTREAM_CONNECT_TIMEOUT", 2.0)) # Seconds to establish a connection
+UPSTREAM_READ_TIMEOUT = float(os.environ.get("UPSTREAM_READ_TIMEOUT", 5.0)) # Seconds to wait for response bytes
+UPSTREAM_RETRIES = int(os.environ.get("UPSTREAM_RETRIES", 2)) # Extra attempts after the first one fails
+UPSTREAM_BACKOFF = float(os.environ.get("UPSTREAM_BACKOFF", 0.25)) # Base delay for exponential backoff with full jitter
+UPSTREAM_POOL_SIZE = int(os.environ.get("UPSTREAM_POOL_SIZE", 10)) # Keep-alive connections kept per host
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get("BREAKER_FAILURE_THRESHOLD", 5)) # Consecutive failed calls before opening
+BREAKER_RESET_TIMEOUT = float(os.environ.get("BREAKER_RESET_TIMEOUT", 30.0)) # Seconds the breaker stays open before a probe
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504} # Upstream statuses worth retrying
+
+UPSTREAM_ERRORS = Counter("upstream_errors_total", "Failed upstream attempts by kind", ["kind"])
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling upstream while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Closed -> open after repeated failures -> half-open probe after a cool-down -> closed on success."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD, reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0 # Consecutive failed calls
+        self._opened_at = 0.0 # Monotonic time the breaker last opened
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow(self) -> bool:
+        """Return True if a call may go upstream now (at most one probe while half-open)."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self._reset_timeout:
+                self._state = self.HALF_OPEN # Let exactly one caller probe upstream
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self._failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class UpstreamClient:
+    """Pooled, time-bounded JSON client with retries and a circuit breaker."""
+
+    def __init__(self, url: str, connect_timeout: float = UPSTREAM_CONNECT_TIMEOUT, read_timeout: float = UPSTREAM_READ_TIMEOUT,
+                 retries: int = UPSTREAM_RETRIES, backoff: float = UPSTREAM_BACKOFF, pool_size: int = UPSTREAM_POOL_SIZE,
+                 breaker: CircuitBreaker = None):
+        self.url = url
+        self.timeout = (connect_timeout, read_timeout) # requests applies these per attempt
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.session = requests.Session() # Reuses keep-alive connections across calls
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0) # Retries are handled below
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get_json(self, params: dict = None):
+        """GET the upstream URL and decode JSON, retrying transient failures with jittered backoff."""
+        if not self.breaker.allow():
+            UPSTREAM_ERRORS.inc("circuit_open")
+            raise CircuitOpenError(f"Circuit open for {self.url}, failing fast")
+        last_error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(random.uniform(0, self.backoff * 2 ** (attempt - 1))) # Full jitter spreads out retry bursts
+            try:
+                response = self.session.get(self.url, params=params, timeout=self.timeout)
+                if response.status_code in RETRYABLE_STATUS:
+                    UPSTREAM_ERRORS.inc("http_status")
+                    last_error = requests.exceptions.HTTPError(f"{response.status_code} from {self.url}", response=response)
+                    continue
+                if response.status_code >= 400:
+                    UPSTREAM_ERRORS.inc("http_status")
+                    self.breaker.record_success() # Upstream is answering; other 4xx are our fault and are not retried
+                    response.raise_for_status()
+                data = response.json()
+            except requests.exceptions.Timeout as e:
+                UPSTREAM_ERRORS.inc("timeout") # Connect or read deadline hit
+                last_error = e
+                continue
+            except (requests.exceptions.ConnectionError, ValueError) as e:
+                UPSTREAM_ERRORS.inc("connection" if isinstance(e, requests.exceptions.ConnectionError) else "bad_body")
+                last_error = e # Connection refused/reset, or a truncated body
+                continue
+            except requests.exceptions.HTTPError:
+                raise
+            except Exception:
+                UPSTREAM_ERRORS.inc("other")
+                self.breaker.record_failure()
+                raise
+            self.breaker.record_success()
+            return data
+        self.breaker.record_failure()
+        raise last_error
+
+    def close(self) -> None:
+        self.session.close()
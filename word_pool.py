@@ -0,0 +1,191 @@
+import mmap
+import os
+import random
+import struct
+import threading
+import time
+
+import startup
+from app_logging import get_logger
+from metrics import STAGE_SECONDS, Counter
+from upstream import UpstreamClient
+from word_store import WordStore
+
+
+# --- Word Pool Configuration ---
+WORD_API_URL = os.environ.get("WORD_API_URL", "https://api.datamuse.com/words") # Datamuse endpoint used to (re)fill the pool
+WORD_POOL_SIZE = int(os.environ.get("WORD_POOL_SIZE", 1000)) # How many words to ask Datamuse for per refresh (Datamuse caps at 1000)
+WORD_POOL_TTL = float(os.environ.get("WORD_POOL_TTL", 3600)) # Seconds before the pool is considered stale and revalidated
+WORD_POOL_RETRY = float(os.environ.get("WORD_POOL_RETRY", 30)) # Seconds to wait before retrying after a failed refresh
+FALLBACK_WORDS = ["APPLE", "HOUSE", "TRAIN", "PLANT", "EARTH"] # Last-resort words when the pool has never been filled
+WORD_POOL_SNAPSHOT = os.environ.get("WORD_POOL_SNAPSHOT", "word_pool.snapshot") # Warm-start file ("" disables snapshots)
+
+# --- Snapshot File Format ---
+# header: MAGIC, word count (u32), wall-clock fetch time (f64); then count fixed-width 5-byte words
+SNAPSHOT_MAGIC = b"WPS1"
+SNAPSHOT_HEADER = struct.Struct("<4sId")
+SNAPSHOT_RECORD_SIZE = 5
+
+datamuse_client = UpstreamClient(WORD_API_URL) # Pooled session with deadlines, retries and a circuit breaker
+
+logger = get_logger("word_pool")
+FALLBACK_WORDS_SERVED = Counter("word_pool_fallback_total", "Words served from the hardcoded fallback list")
+
+
+def fetch_words(size: int = WORD_POOL_SIZE, client: UpstreamClient = None) -> list:
+    """Fetch 5-letter words from Datamuse and return them uppercased and filtered."""
+    params = {
+        'sp': '?????', # Wildcard for exactly 5 letters
+        'max': size # Fetch a whole pool's worth of words in one call
+    }
+    client = client or datamuse_client
+    # Raises on timeouts/HTTP errors, or CircuitOpenError while Datamuse is known to be down
+    start = time.perf_counter()
+    word_data = client.get_json(params)
+    fetched = time.perf_counter()
+    words = filter_words(d['word'] for d in word_data)
+    STAGE_SECONDS.observe(fetched - start, "upstream_fetch")
+    STAGE_SECONDS.observe(time.perf_counter() - fetched, "filter")
+    return words
+
+
+def filter_words(words) -> list:
+    """Keep strictly alphabetic ASCII 5-letter words, uppercased and de-duplicated in order."""
+    return list(dict.fromkeys(w.upper() for w in words if len(w) == 5 and w.isascii() and w.isalpha()))
+
+
+def save_snapshot(path: str, store: WordStore, fetched_at: float) -> None:
+    """Write the pool to a compact binary snapshot (atomically replacing any previous one)."""
+    tmp_path = f"{path}.{os.getpid()}.tmp" # Per process: gunicorn workers may refresh at the same time
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, len(store), fetched_at))
+        f.write(store.data) # Already the packed record layout
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path: str):
+    """Return (word store, wall-clock fetch time) from a snapshot, or None if it is missing or invalid."""
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            magic, count, fetched_at = SNAPSHOT_HEADER.unpack_from(data, 0)
+            body = data[SNAPSHOT_HEADER.size:]
+    except (OSError, ValueError, struct.error):
+        return None # Missing, empty or truncated file: start cold
+    if magic != SNAPSHOT_MAGIC or len(body) != count * SNAPSHOT_RECORD_SIZE:
+        return None
+    try:
+        return WordStore.from_packed(body, SNAPSHOT_RECORD_SIZE), fetched_at
+    except ValueError:
+        return None # Not uppercase A-Z: written by something else
+
+
+class WordPool:
+    """In-process pool of words, refreshed in the background with stale-while-revalidate."""
+
+    def __init__(self, fetch=fetch_words, ttl: float = WORD_POOL_TTL, retry: float = WORD_POOL_RETRY, fallback=FALLBACK_WORDS,
+                 snapshot_path: str = WORD_POOL_SNAPSHOT):
+        self._fetch = fetch # Callable returning a fresh list of words (raises on upstream failure)
+        self._snapshot_path = snapshot_path
+        self._ttl = ttl
+        self._retry = retry
+        self._fallback = list(fallback)
+        self._store = None # Current pool as a packed WordStore; replaced wholesale so readers never see a partial pool
+        self._fetched_at = 0.0 # Monotonic time of the last successful refresh
+        self._next_attempt = 0.0 # Monotonic time before which a failed refresh is not retried
+        self._refreshing = threading.Lock() # Held while a refresh is running so only one runs at a time
+        self._wakeup = threading.Event() # Set to make the background thread refresh early
+        self._thread = None
+        self._pid = None # Process that owns the background thread (threads do not survive a fork)
+        self._start_lock = threading.Lock()
+
+    @property
+    def words(self) -> list:
+        """The words currently being served (empty until the first successful refresh)."""
+        store = self._store
+        return store.words() if store is not None else []
+
+    @property
+    def store(self):
+        """The current WordStore, or None until the first successful refresh."""
+        return self._store
+
+    @property
+    def is_stale(self) -> bool:
+        return self._store is None or time.monotonic() - self._fetched_at >= self._ttl
+
+    def start(self, block: bool = True) -> None:
+        """Fill the pool (from the snapshot, else optionally blocking on upstream) and start the background refresher."""
+        with self._start_lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return # Already running in this process
+            self._pid = os.getpid()
+            if self._store is None:
+                self.load_snapshot() # Warm start: serve the last known words while the refresher revalidates them
+            if block and self._store is None:
+                self.refresh()
+            self._thread = threading.Thread(target=self._run, name="word-pool-refresh", daemon=True)
+            self._thread.start()
+
+    def refresh(self) -> bool:
+        """Refresh the pool from upstream now; returns True if new words were installed."""
+        fetched_at = self._fetched_at
+        with self._refreshing:
+            if self._fetched_at != fetched_at:
+                return False # Another thread refreshed while we waited for the lock
+            try:
+                words = self._fetch()
+            except Exception as e:
+                logger.warning("Word pool refresh failed: %s", e, extra={"error": type(e).__name__})
+                self._next_attempt = time.monotonic() + self._retry
+                return False
+            if not words:
+                logger.warning("Word pool refresh returned no suitable 5-letter words, keeping current pool")
+                self._next_attempt = time.monotonic() + self._retry
+                return False
+            store = WordStore(words)
+            self._store = store
+            self._fetched_at = time.monotonic()
+            startup.mark("word_pool_ready")
+            logger.info("Word pool refreshed", extra={"words": len(words)})
+            if self._snapshot_path:
+                try:
+                    save_snapshot(self._snapshot_path, store, time.time())
+                except OSError as e:
+                    logger.warning("Could not write word pool snapshot: %s", e)
+            return True
+
+    def load_snapshot(self) -> bool:
+        """Install words from the snapshot file, keeping its age for staleness; returns True if loaded."""
+        loaded = load_snapshot(self._snapshot_path) if self._snapshot_path else None
+        if not loaded or not len(loaded[0]):
+            return False
+        store, fetched_wall = loaded
+        age = max(0.0, time.time() - fetched_wall)
+        self._store = store
+        self._fetched_at = time.monotonic() - age # A stale snapshot is served but revalidated right away
+        startup.mark("word_pool_ready")
+        logger.info("Word pool loaded from snapshot", extra={"words": len(store), "age_seconds": round(age, 1)})
+        return True
+
+    def random_word(self, query=None) -> str:
+        """Pick a random word (matching a WordStore query, if given), triggering a background revalidation if the pool is stale."""
+        if self._pid != os.getpid():
+            self.start(block=False) # First use in a forked worker: restart the refresher here
+        store = self._store
+        if self.is_stale and time.monotonic() >= self._next_attempt:
+            self._wakeup.set() # Serve the stale pool now and let the background thread revalidate
+        if store is None:
+            FALLBACK_WORDS_SERVED.inc()
+            return random.choice(self._fallback)
+        return store.random_word(query)
+
+    def _run(self) -> None:
+        while True:
+            if not self.is_stale:
+                timeout = self._ttl - (time.monotonic() - self._fetched_at) # Sleep until the pool goes stale
+            else:
+                timeout = max(self._next_attempt - time.monotonic(), 0.0) # Empty/stale pool: retry on the failure backoff
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+            if self.is_stale and time.monotonic() >= self._next_attempt:
+                self.refresh()
@@ -0,0 +1,180 @@
+import argparse
+import array
+import random
+import sys
+
+import patterns
+from pattern_compiler import ALPHABET, WORD_LENGTH, compiled
+
+
+# --- Compact Word Store ---
+# Every word lives in one contiguous ASCII buffer (`length` bytes per word), so
+# word id i is data[i * length:(i + 1) * length]. Indexes are bitsets over word ids,
+# held as Python ints (bit i set = word i matches), so a constraint query is a few
+# big-integer ANDs/ORs:
+#
+#   positional : (position, letter) -> words with that letter at that position
+#   shape      : vowel/consonant shape ("CVCCV") -> words with that shape
+#   vowels     : vowel count -> words with exactly that many vowels
+#
+# Sampling from a query result uses an id array cached per query.
+ASCII_A_UPPER = ord('A')
+VOWEL_INDEXES = [ALPHABET.index(v) for v in patterns.VOWELS]
+
+
+def _bitset(ids, count: int) -> int:
+    """Build a bitset from word ids in O(count) (OR-ing ints one bit at a time would be quadratic)."""
+    bits = bytearray((count + 7) // 8)
+    for i in ids:
+        bits[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(bits, "little")
+
+
+class WordStore:
+    """Fixed-length uppercase words packed into one bytes buffer, with bitset indexes."""
+
+    def __init__(self, words, length: int = WORD_LENGTH):
+        words = list(words)
+        data = "".join(words).encode("ascii")
+        if len(data) != length * len(words):
+            raise ValueError(f"All words must be {length} ASCII letters long.")
+        self._init(data, length)
+
+    @classmethod
+    def from_packed(cls, data: bytes, length: int = WORD_LENGTH) -> "WordStore":
+        """Wrap an already packed buffer (e.g. read from a snapshot) without decoding each word."""
+        if len(data) % length:
+            raise ValueError(f"Packed data is not a whole number of {length}-byte words.")
+        store = cls.__new__(cls)
+        store._init(bytes(data), length)
+        return store
+
+    def _init(self, data: bytes, length: int) -> None:
+        if data and not data.isalpha() or data != data.upper():
+            raise ValueError("A word store only holds uppercase A-Z words.")
+        self.data = data
+        self.length = length
+        self.count = len(data) // length
+        self.all = (1 << self.count) - 1 # Bitset of every word
+
+        positional = [[[] for _ in ALPHABET] for _ in range(length)] # Word ids per (position, letter)
+        shapes, vowel_counts = {}, {}
+        is_vowel = bytes(1 if chr(c) in patterns.VOWELS else 0 for c in range(256))
+        for i in range(self.count):
+            word = data[i * length:(i + 1) * length]
+            for position, c in enumerate(word):
+                positional[position][c - ASCII_A_UPPER].append(i)
+            flags = word.translate(is_vowel)
+            shapes.setdefault(flags, []).append(i)
+            vowel_counts.setdefault(sum(flags), []).append(i)
+        self._positional = [[_bitset(ids, self.count) for ids in letters] for letters in positional]
+        self._shapes = {bytes(b"CV"[f] for f in flags).decode(): _bitset(ids, self.count) for flags, ids in shapes.items()}
+        self._vowel_counts = {n: _bitset(ids, self.count) for n, ids in vowel_counts.items()}
+        self._selections = {} # Query -> array of matching word ids (for O(1) random picks)
+        self._words = None # Materialized list of str, only built if someone asks for it
+
+    # --- Access ---
+    def word(self, i: int) -> str:
+        return self.data[i * self.length:(i + 1) * self.length].decode("ascii")
+
+    def words(self) -> list:
+        """All words as a list of str (built once, on first use)."""
+        if self._words is None:
+            text = self.data.decode("ascii")
+            self._words = [text[i:i + self.length] for i in range(0, len(text), self.length)]
+        return self._words
+
+    def __len__(self):
+        return self.count
+
+    def ids(self, mask: int) -> list:
+        """Word ids set in a bitset, in order."""
+        ids = []
+        for byte_index, byte in enumerate(mask.to_bytes((self.count + 7) // 8, "little")):
+            while byte:
+                low = byte & -byte
+                ids.append(byte_index * 8 + low.bit_length() - 1)
+                byte ^= low
+        return ids
+
+    def matching(self, mask: int) -> list:
+        return [self.word(i) for i in self.ids(mask)]
+
+    # --- Constraint queries (each returns a bitset) ---
+    def with_letter(self, position: int, letter: str) -> int:
+        return self._positional[position][ord(letter) - ASCII_A_UPPER]
+
+    def with_vowel_at(self, position: int) -> int:
+        mask = 0
+        for v in VOWEL_INDEXES:
+            mask |= self._positional[position][v]
+        return mask
+
+    def with_shape(self, shape: str) -> int:
+        """Words matching a shape of "V" (vowel), "C" (consonant) and "?" (either), e.g. "C?CCV"."""
+        mask = 0
+        for candidate, bits in self._shapes.items():
+            if all(want in ("?", have) for want, have in zip(shape, candidate)):
+                mask |= bits
+        return mask
+
+    def min_vowels(self, count: int) -> int:
+        mask = 0
+        for n, bits in self._vowel_counts.items():
+            if n >= count:
+                mask |= bits
+        return mask
+
+    def transform_is_word(self, pattern_func) -> int:
+        """Words whose transform under pattern_func is also a word in this store."""
+        members = set(self.words())
+        transform = compiled(pattern_func)
+        return _bitset((i for i, word in enumerate(self.words()) if transform(word) in members), self.count)
+
+    # --- Sampling ---
+    def random_word(self, query=None) -> str:
+        """A random word, optionally restricted to query(self) (cached per query); any word if nothing matches."""
+        if query is None:
+            return self.word(random.randrange(self.count))
+        ids = self._selections.get(query)
+        if ids is None:
+            ids = self._selections[query] = array.array("I", self.ids(query(self)))
+        if not ids:
+            return self.word(random.randrange(self.count))
+        return self.word(random.choice(ids))
+
+    def memory_footprint(self) -> dict:
+        """Approximate bytes held by this store versus the same words as a list of str."""
+        bitsets = [b for letters in self._positional for b in letters]
+        bitsets += list(self._shapes.values()) + list(self._vowel_counts.values())
+        packed = sys.getsizeof(self.data)
+        indexes = sum(sys.getsizeof(b) for b in bitsets)
+        as_list = sys.getsizeof([None] * self.count) + sum(sys.getsizeof(self.word(i)) for i in range(self.count))
+        return {"words": self.count, "packed_bytes": packed, "index_bytes": indexes,
+                "store_bytes": packed + indexes, "list_of_str_bytes": as_list}
+
+
+# --- Word choice per pattern ---
+# Word-dependent patterns leave many words unchanged (vowel_position_swap needs two
+# vowels, vowel_swap_0_2 needs vowels at positions 0 and 2), which makes for a
+# trivial puzzle, so puzzles for them are drawn from the words they actually change.
+PLAYABLE_WORDS = { # Pattern function -> query selecting the words worth serving with it
+    patterns.vowel_position_swap: lambda store: store.min_vowels(2),
+    patterns.vowel_swap_0_2: lambda store: store.with_vowel_at(0) & store.with_vowel_at(2),
+}
+
+
+if __name__ == "__main__": # python word_store.py --words words.txt
+    from puzzle_index import load_word_list
+
+    parser = argparse.ArgumentParser(description="Report a word store's memory footprint and index sizes.")
+    parser.add_argument("--words", required=True, help="Word list, one word per line")
+    args = parser.parse_args()
+
+    store = WordStore(load_word_list(args.words))
+    footprint = store.memory_footprint()
+    print(f"{footprint['words']} words: store {footprint['store_bytes']:,} bytes "
+          f"(packed {footprint['packed_bytes']:,} + indexes {footprint['index_bytes']:,}) "
+          f"vs list of str {footprint['list_of_str_bytes']:,} bytes")
+    print(f"  >=2 vowels: {store.min_vowels(2).bit_count()}, shape CVCCV: {store.with_shape('CVCCV').bit_count()}, "
+          f"reverse_alphabet_substitution lands on a word: {store.transform_is_word(patterns.reverse_alphabet_substitution).bit_count()}")